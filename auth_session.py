@@ -0,0 +1,80 @@
+import streamlit as st
+import streamlit.components.v1 as components
+import database as db
+
+# "Remember me": the browser keeps a random session token in a cookie, and a
+# new browser session is signed in by looking the token up in the sessions
+# table instead of asking for the password again.
+COOKIE_NAME = "recipes_session"
+
+# Cookie change waiting to be written by the pages that render. Pages often
+# switch right after signing in/out (e.g. the Dashboard's landing page
+# redirect), which can drop the script before it runs, so the change stays
+# pending and is written again on every page until the browser is seen
+# sending the cookie back (st.context.cookies is read when it connects).
+_PENDING_COOKIE_KEY = "pending_session_cookie"
+
+def _is_https():
+    # Behind a proxy the app itself is plain http; trust the proxy's header
+    proto = st.context.headers.get("X-Forwarded-Proto", "")
+    return proto.lower() == "https" or (st.context.url or "").startswith("https://")
+
+def _write_pending_cookie():
+    pending = st.session_state.get(_PENDING_COOKIE_KEY)
+    if pending is None:
+        return
+
+    value, max_age = pending
+    if (st.context.cookies.get(COOKIE_NAME) or "") == value:
+        del st.session_state[_PENDING_COOKIE_KEY]
+        return
+
+    secure = "; Secure" if _is_https() else ""
+    # st.context.cookies is read-only, so the cookie is set from the browser
+    components.html(
+        f"<script>parent.document.cookie = "
+        f"'{COOKIE_NAME}={value}; Max-Age={max_age}; Path=/; SameSite=Strict{secure}';</script>",
+        height=0
+    )
+
+def restore_session():
+    """
+    Call at the top of every page: signs the user in from a remembered
+    session cookie if this browser session is not signed in yet.
+    """
+    _write_pending_cookie()
+
+    if st.session_state.get('user_id') is not None:
+        return
+
+    # Check the cookie once per browser session
+    if st.session_state.get('session_restore_checked'):
+        return
+    st.session_state.session_restore_checked = True
+
+    token = st.context.cookies.get(COOKIE_NAME)
+    user = db.validate_session(token)
+    if user is None:
+        return
+
+    st.session_state.user_id = user['user_id']
+    st.session_state.username = user['username']
+    st.session_state.session_token = token
+
+def remember_user(user_id):
+    """Remember this browser for the signed-in user (the "Remember me" box)."""
+    token = db.create_session(user_id)
+    st.session_state.session_token = token
+    st.session_state[_PENDING_COOKIE_KEY] = (token, db.SESSION_TTL_DAYS * 24 * 60 * 60)
+
+def sign_out():
+    """Forget the remembered session (server and browser) and clear session state."""
+    token = st.session_state.get('session_token') or st.context.cookies.get(COOKIE_NAME)
+    db.revoke_session(token)
+
+    for key in list(st.session_state.keys()):
+        del st.session_state[key]
+
+    # The cookie sent with this connection is stale now; don't restore from it
+    st.session_state.session_restore_checked = True
+    st.session_state[_PENDING_COOKIE_KEY] = ("", 0)
@@ -1,15 +1,343 @@
 import sqlite3
 import json
+import html
+import re
 from datetime import datetime, date
 import os
-import bcrypt
+import time
+import secrets
+import hashlib
+import atexit
+import threading
+import functools
+from collections import OrderedDict
+
+from password_pool import hash_password, check_password, needs_rehash, PasswordPoolError
+from records import Recipe, RecipeSummary, RecipeSearchResult, PantryItem, ShoppingItem, MealPlanEntry
+
+try:
+    import numpy as np
+except ImportError:  # optional, only used to speed up convert_units_batch
+    np = None
+
+# Database settings (can be overridden per deployment with environment variables)
+DB_PATH = os.environ.get('RECIPES_DB_PATH', 'data/recipes.db')
+DB_POOL_SIZE = int(os.environ.get('RECIPES_DB_POOL_SIZE', '8'))
+DB_STATEMENT_CACHE_SIZE = int(os.environ.get('RECIPES_DB_STATEMENT_CACHE', '256'))
+DB_QUERY_CACHE_SIZE = int(os.environ.get('RECIPES_DB_QUERY_CACHE_SIZE', '512'))  # 0 disables
+VERIFICATION_TOKEN_TTL = int(os.environ.get('RECIPES_VERIFICATION_TTL', '300'))  # seconds
+SESSION_TTL_DAYS = int(os.environ.get('RECIPES_SESSION_TTL_DAYS', '30'))
+
+# PRAGMAs applied to every new connection, in this order. busy_timeout goes
+# first so switching the journal mode waits for other writers instead of failing.
+DB_PRAGMAS = {
+    'busy_timeout': int(os.environ.get('RECIPES_DB_BUSY_TIMEOUT', '5000')),  # milliseconds
+    'journal_mode': os.environ.get('RECIPES_DB_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.environ.get('RECIPES_DB_SYNCHRONOUS', 'NORMAL'),
+    'cache_size': int(os.environ.get('RECIPES_DB_CACHE_SIZE', '-16000')),  # negative = KiB
+    'mmap_size': int(os.environ.get('RECIPES_DB_MMAP_SIZE', str(128 * 1024 * 1024))),  # bytes
+    'temp_store': os.environ.get('RECIPES_DB_TEMP_STORE', 'MEMORY'),
+}
+
+# Idle connections waiting to be reused. The generation goes up whenever the
+# settings change; connections opened under an older one are not reused.
+_idle_connections = []
+_pool_generation = 0
+_pool_lock = threading.Lock()
+
+class PooledConnection(sqlite3.Connection):
+    """
+    sqlite3 connection that is handed back to the pool when closed.
+    The database functions keep calling conn.close() as before; the underlying
+    handle (and its prepared statement cache) stays open for the next caller.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.released = False
+        self.generation = None
+
+    def close(self):
+        _release_connection(self)
 
 #helper functions
-def get_db_connection():
-    conn = sqlite3.connect('data/recipes.db')
+def _open_connection():
+    # Read before the settings, so a reconfiguration that happens meanwhile
+    # marks this connection as stale
+    generation = _pool_generation
+    conn = sqlite3.connect(
+        DB_PATH,
+        factory=PooledConnection,
+        check_same_thread=False,  # connections move between Streamlit script threads
+        cached_statements=DB_STATEMENT_CACHE_SIZE
+    )
+    conn.generation = generation
     conn.execute("PRAGMA foreign_keys = ON")
+    apply_pragmas(conn)
+    return conn
+
+def _check_pragma(name, value):
+    # Values are interpolated into the statement, so only allow plain words/numbers
+    if name not in DB_PRAGMAS:
+        raise ValueError(f"Unsupported PRAGMA: {name}")
+    if not str(value).lstrip('-').isalnum():
+        raise ValueError(f"Invalid value for PRAGMA {name}: {value}")
+
+def apply_pragmas(conn, pragmas=None):
+    for name, value in (pragmas or DB_PRAGMAS).items():
+        _check_pragma(name, value)
+        conn.execute(f"PRAGMA {name} = {value}")
+
+def get_db_connection():
+    with _pool_lock:
+        conn = _idle_connections.pop() if _idle_connections else None
+
+    if conn is None:
+        conn = _open_connection()
+
+    conn.released = False
     return conn
 
+def _release_connection(conn):
+    if conn.released:
+        return
+    conn.released = True
+
+    try:
+        # Never hand out a connection with a half-finished transaction
+        if conn.in_transaction:
+            conn.rollback()
+    except sqlite3.Error:
+        sqlite3.Connection.close(conn)
+        return
+
+    with _pool_lock:
+        # Connections opened before a reconfiguration may use the old file or PRAGMAs
+        if conn.generation == _pool_generation and len(_idle_connections) < DB_POOL_SIZE:
+            _idle_connections.append(conn)
+            return
+
+    sqlite3.Connection.close(conn)
+
+def close_all_connections():
+    """
+    Close every idle pooled connection (used on shutdown and reconfiguration).
+    Connections in use are closed instead of pooled when they are released.
+    """
+    global _pool_generation
+
+    with _pool_lock:
+        _pool_generation += 1
+        idle = list(_idle_connections)
+        _idle_connections.clear()
+
+    for conn in idle:
+        sqlite3.Connection.close(conn)
+
+def configure_db_pool(pool_size=None, db_path=None):
+    """
+    Change the pool size and/or database file at runtime.
+    Pooled connections are closed so new ones pick up the settings.
+    """
+    global DB_POOL_SIZE, DB_PATH, _schema_ready
+
+    if pool_size is not None:
+        if pool_size < 0:
+            raise ValueError("pool_size cannot be negative")
+        DB_POOL_SIZE = pool_size
+    if db_path is not None:
+        DB_PATH = db_path
+        _schema_ready = False  # the new file has to be checked/migrated again
+        clear_query_cache()
+
+    close_all_connections()
+
+def configure_db_pragmas(**pragmas):
+    """
+    Override the connection PRAGMA profile, e.g. configure_db_pragmas(synchronous='FULL').
+    Pooled connections are closed so new ones pick up the settings.
+    """
+    for name, value in pragmas.items():
+        _check_pragma(name, value)
+
+    DB_PRAGMAS.update(pragmas)
+    close_all_connections()
+
+atexit.register(close_all_connections)
+
+# Read cache
+# Streamlit reruns a page on every click, so the read functions below are
+# cached in memory. Each table has a version counter per user, plus a shared
+# one (scope None) for writes that affect everyone. A write bumps the counters
+# for the tables it touches; cached results stored under older versions are
+# simply never served again. Only writes made through this module (in this
+# server process) are seen.
+_query_cache = OrderedDict()
+_cache_versions = {}
+_cache_lock = threading.Lock()
+_cache_stats = {'hits': 0, 'misses': 0}
+
+def _cache_stamp(user_id, tables):
+    return tuple(
+        (_cache_versions.get((None, table), 0), _cache_versions.get((user_id, table), 0))
+        for table in tables
+    )
+
+def _copy_result(value):
+    # Lists/dicts are copied so callers can sort or edit them; records are immutable
+    if isinstance(value, list):
+        return [_copy_result(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _copy_result(v) for k, v in value.items()}
+    return value
+
+def _cached(*tables, per_user=True):
+    """
+    Cache a read function's results. tables lists what the query reads; with
+    per_user the first argument (or user_id=) is the user the result belongs to.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if DB_QUERY_CACHE_SIZE <= 0:
+                return func(*args, **kwargs)
+
+            user_id = None
+            if per_user:
+                user_id = kwargs['user_id'] if 'user_id' in kwargs else args[0]
+            key = (func.__name__, args, tuple(sorted(kwargs.items())))
+
+            with _cache_lock:
+                # Taken before running the query, so a write that lands while
+                # it runs leaves this result stale on arrival (never served)
+                stamp = _cache_stamp(user_id, tables)
+                entry = _query_cache.get(key)
+                if entry is not None and entry[0] == stamp:
+                    _query_cache.move_to_end(key)
+                    _cache_stats['hits'] += 1
+                    return _copy_result(entry[1])
+                _cache_stats['misses'] += 1
+
+            result = func(*args, **kwargs)
+
+            with _cache_lock:
+                _query_cache[key] = (stamp, result)
+                _query_cache.move_to_end(key)
+                while len(_query_cache) > DB_QUERY_CACHE_SIZE:
+                    _query_cache.popitem(last=False)
+
+            return _copy_result(result)
+        return wrapper
+    return decorator
+
+def invalidate_cache(user_id, *tables):
+    """
+    Mark cached reads of the given tables as stale. user_id None means the
+    change is visible to every user (e.g. a public recipe was edited).
+    """
+    with _cache_lock:
+        for table in tables:
+            key = (user_id, table)
+            _cache_versions[key] = _cache_versions.get(key, 0) + 1
+
+def clear_query_cache():
+    with _cache_lock:
+        _query_cache.clear()
+        _cache_versions.clear()
+
+def get_data_version(*tables):
+    """
+    Marker that changes whenever a write through this module touches one of
+    the tables for all users, for pages that keep query results themselves.
+    """
+    with _cache_lock:
+        return _cache_stamp(None, tables)
+
+def get_query_cache_stats():
+    with _cache_lock:
+        return {**_cache_stats, 'entries': len(_query_cache), 'max_entries': DB_QUERY_CACHE_SIZE}
+
+def _owner_of(cursor, table, id_column, row_id):
+    # user_id of a row, looked up before writes that are only given the row's id
+    cursor.execute(f"SELECT user_id FROM {table} WHERE {id_column} = ?", (row_id,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+# Unit registry, built once at import: every spelling we accept maps to a
+# canonical unit, and each canonical unit knows its system, what it measures
+# and how to convert it to the other system
+_UNIT_ALIASES = {
+    # Weight
+    'lbs': ('lb', 'lbs', 'pound', 'pounds'),
+    'oz': ('oz', 'ounce', 'ounces'),
+    'g': ('g', 'gram', 'grams'),
+    'kg': ('kg', 'kilo', 'kilogram'),
+
+    # Volume
+    'cups': ('cup', 'cups'),
+    'tbsp': ('tbsp', 'tablespoon', 'tablespoons'),
+    'tsp': ('tsp', 'teaspoon', 'teaspoons'),
+    'fl oz': ('fl oz', 'fluid ounce', 'fluid ounces'),
+    'pint': ('pt', 'pint', 'pints'),
+    'quart': ('qt', 'quart', 'quarts'),
+    'gallon': ('gal', 'gallon', 'gallons'),
+    'ml': ('ml', 'milliliter', 'milliliters'),
+    'l': ('l', 'liter', 'liters'),
+}
+
+# canonical unit -> (system, dimension, unit in the other system, factor)
+UNIT_REGISTRY = {
+    # Imperial to Metric - Weight
+    'lbs': ('imperial', 'weight', 'kg', 0.453592),
+    'oz': ('imperial', 'weight', 'g', 28.3495),
+    # Imperial to Metric - Volume
+    'cups': ('imperial', 'volume', 'ml', 236.588),
+    'tbsp': ('imperial', 'volume', 'ml', 14.7868),
+    'tsp': ('imperial', 'volume', 'ml', 4.92892),
+    'fl oz': ('imperial', 'volume', 'ml', 29.5735),
+    'pint': ('imperial', 'volume', 'ml', 473.176),
+    'quart': ('imperial', 'volume', 'ml', 946.353),
+    'gallon': ('imperial', 'volume', 'ml', 3785.41),
+    # Metric to Imperial - Weight
+    'kg': ('metric', 'weight', 'lbs', 2.20462),
+    'g': ('metric', 'weight', 'oz', 0.035274),
+    # Metric to Imperial - Volume
+    'ml': ('metric', 'volume', 'cups', 0.00422675),
+    'l': ('metric', 'volume', 'gallon', 0.264172),
+}
+
+# alias -> registry entry, so a lookup is a single dict access
+_UNITS_BY_ALIAS = {
+    alias: UNIT_REGISTRY[canonical]
+    for canonical, aliases in _UNIT_ALIASES.items()
+    for alias in aliases
+}
+
+def _lookup_unit(unit):
+    return _UNITS_BY_ALIAS.get(unit.lower().strip())
+
+def _round_quantity(qty):
+    # Round sensibly
+    if qty >= 100:
+        return round(qty, 1)
+    if qty >= 10:
+        return round(qty, 2)
+    return round(qty, 3)
+
+def is_convertible(unit, to_system=None):
+    """
+    True if convert_unit would change the unit: it is a known unit from the
+    opposite system of to_system (or, without to_system, from either system).
+    """
+    if not unit:
+        return False
+
+    entry = _lookup_unit(unit)
+    if entry is None:
+        return False
+    if to_system is None:
+        return True
+    return entry[0] != ("metric" if to_system == "metric" else "imperial")
+
 def convert_unit(quantity, from_unit, to_system="metric"):
     """
     Convert a unit to the target system (metric or imperial).
@@ -18,184 +346,395 @@ def convert_unit(quantity, from_unit, to_system="metric"):
     if from_unit is None:
         return quantity, ""
 
-    unit = from_unit.lower().strip()
+    entry = _lookup_unit(from_unit)
     qty = float(quantity)
 
-    # Normalize common variations
-    unit_map = {
-        # Weight
-        'lb': 'lbs', 'lbs': 'lbs', 'pound': 'lbs', 'pounds': 'lbs',
-        'oz': 'oz', 'ounce': 'oz', 'ounces': 'oz',
-        'g': 'g', 'gram': 'g', 'grams': 'g',
-        'kg': 'kg', 'kilo': 'kg', 'kilogram': 'kg',
-
-        # Volume
-        'cup': 'cups', 'cups': 'cups',
-        'tbsp': 'tbsp', 'tablespoon': 'tbsp', 'tablespoons': 'tbsp',
-        'tsp': 'tsp', 'teaspoon': 'tsp', 'teaspoons': 'tsp',
-        'fl oz': 'fl oz', 'fluid ounce': 'fl oz', 'fluid ounces': 'fl oz',
-        'pt': 'pint', 'pint': 'pint', 'pints': 'pint',
-        'qt': 'quart', 'quart': 'quart', 'quarts': 'quart',
-        'gal': 'gallon', 'gallon': 'gallon', 'gallons': 'gallon',
-        'ml': 'ml', 'milliliter': 'ml', 'milliliters': 'ml',
-        'l': 'l', 'liter': 'l', 'liters': 'l',
-    }
-
-    normalized = unit_map.get(unit, unit)
+    # Unknown unit, or already in the target system: return as-is
+    if entry is None or entry[0] == ("metric" if to_system == "metric" else "imperial"):
+        return qty, from_unit
 
-    # Define which units belong to which system
-    imperial_units = {'lbs', 'oz', 'cups', 'tbsp', 'tsp', 'fl oz', 'pint', 'quart', 'gallon'}
-    metric_units = {'kg', 'g', 'ml', 'l'}
+    _, _, new_unit, factor = entry
+    return _round_quantity(qty * factor), new_unit
 
-    # If converting to metric and unit is already metric, return as-is
-    if to_system == "metric" and normalized in metric_units:
-        return qty, from_unit
-    
-    # If converting to imperial and unit is already imperial, return as-is
-    if to_system == "imperial" and normalized in imperial_units:
-        return qty, from_unit
+# Batches at least this big are converted with NumPy (when installed)
+_NUMPY_BATCH_MIN = 1000
 
-    # Define conversions
-    if to_system == "metric":
-        conversions = {
-            # Imperial to Metric - Weight
-            'lbs': (qty * 0.453592, 'kg'),
-            'oz': (qty * 28.3495, 'g'),
-            # Imperial to Metric - Volume
-            'cups': (qty * 236.588, 'ml'),
-            'tbsp': (qty * 14.7868, 'ml'),
-            'tsp': (qty * 4.92892, 'ml'),
-            'fl oz': (qty * 29.5735, 'ml'),
-            'pint': (qty * 473.176, 'ml'),
-            'quart': (qty * 946.353, 'ml'),
-            'gallon': (qty * 3785.41, 'ml'),
-        }
-    else:  # to_system == "imperial"
-        conversions = {
-            # Metric to Imperial - Weight
-            'kg': (qty * 2.20462, 'lbs'),
-            'g': (qty * 0.035274, 'oz'),
-            # Metric to Imperial - Volume
-            'ml': (qty * 0.00422675, 'cups'),
-            'l': (qty * 0.264172, 'gallon'),
-        }
-
-    if normalized in conversions:
-        new_qty, new_unit = conversions[normalized]
-        # Round sensibly
-        if new_qty >= 100:
-            new_qty = round(new_qty, 1)
-        elif new_qty >= 10:
-            new_qty = round(new_qty, 2)
-        else:
-            new_qty = round(new_qty, 3)
-        return new_qty, new_unit
+def convert_units_batch(quantities, units, to_system="metric"):
+    """
+    convert_unit for whole columns: returns (quantities, units) as new lists.
+    Entries that don't convert (no quantity, unknown unit or already in
+    to_system) are returned unchanged. Large batches use NumPy if available;
+    its rounding can differ from round() in the last decimal on exact ties.
+    """
+    quantities = list(quantities)
+    units = list(units)
+    if len(quantities) != len(units):
+        raise ValueError("quantities and units must have the same length")
+
+    target_system = "metric" if to_system == "metric" else "imperial"
+
+    # Look each distinct unit up once; collect the entries that convert
+    targets = {}
+    indices, factors = [], []
+    for i, (qty, unit) in enumerate(zip(quantities, units)):
+        if qty is None or not unit:
+            continue
+        if unit not in targets:
+            entry = _lookup_unit(unit)
+            targets[unit] = entry if entry is not None and entry[0] != target_system else None
+        entry = targets[unit]
+        if entry is None:
+            continue
+        indices.append(i)
+        factors.append(entry[3])
+        units[i] = entry[2]
+
+    if np is not None and len(indices) >= _NUMPY_BATCH_MIN:
+        values = np.array([quantities[i] for i in indices], dtype=float) * np.array(factors)
+        # Same rounding steps as _round_quantity
+        values = np.where(values >= 100, values.round(1), np.where(values >= 10, values.round(2), values.round(3)))
+        converted = values.tolist()
+    else:
+        converted = [_round_quantity(float(quantities[i]) * factor) for i, factor in zip(indices, factors)]
 
-    # No conversion available (unit not recognized or not in target system)
-    return qty, from_unit
+    for i, qty in zip(indices, converted):
+        quantities[i] = qty
 
+    return quantities, units
 
-# Creates SQLite Database
-def init_DB():
-    os.makedirs('data', exist_ok=True)
-    conn = get_db_connection()
-    cursor = conn.cursor()
 
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS users (
-        user_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE NOT NULL,
-        password TEXT NOT NULL,
-        theme TEXT DEFAULT 'light',
-        units TEXT DEFAULT 'imperial',
-        landing_page TEXT DEFAULT 'dashboard'
-    );
-    """)
+# Schema migrations
+def _add_landing_page_column(cursor):
+    # Databases created before landing_page existed need the column added
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(users)")]
+    if 'landing_page' not in columns:
+        cursor.execute("ALTER TABLE users ADD COLUMN landing_page TEXT DEFAULT 'dashboard'")
 
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS recipes (
-        recipe_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        title TEXT NOT NULL,
-        ingredients TEXT NOT NULL,
-        instructions TEXT NOT NULL,
-        image_path TEXT,
-        is_public BOOLEAN DEFAULT 0,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
-    );
+# Ingredient names from the JSON ingredients column (legacy text is indexed as-is)
+_FTS_INGREDIENT_NAMES = """
+    CASE WHEN json_valid({col}) AND json_type({col}) = 'array'
+         THEN (SELECT group_concat(json_extract(value, '$.name'), ' ') FROM json_each({col}))
+         ELSE {col}
+    END
+"""
+
+def _create_recipe_search_index(cursor):
+    # Full-text index over title, ingredient names and instructions (rowid = recipe_id).
+    # Skipped when this SQLite build has no FTS5; search then falls back to LIKE
+    # and builds the index later if a newer SQLite has FTS5 (_ensure_search_index).
+    try:
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS recipes_fts
+            USING fts5(title, ingredients, instructions, tokenize = 'unicode61 remove_diacritics 2')
         """)
-    
-    # Ingredients table
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS recipe_ingredients (
-        ingredient_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        recipe_id INTEGER NOT NULL,
-        quantity REAL,
-        unit TEXT,
-        name TEXT NOT NULL,
-        order_index INTEGER DEFAULT 0,
-        FOREIGN KEY (recipe_id) REFERENCES recipes(recipe_id) ON DELETE CASCADE
-    );
+    except sqlite3.OperationalError:
+        return
+
+    new_names = _FTS_INGREDIENT_NAMES.format(col='NEW.ingredients')
+
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS recipes_fts_insert AFTER INSERT ON recipes BEGIN
+            INSERT INTO recipes_fts (rowid, title, ingredients, instructions)
+            VALUES (NEW.recipe_id, NEW.title, {new_names}, NEW.instructions);
+        END;
     """)
-    
     cursor.execute("""
-    CREATE TABLE IF NOT EXISTS saved_recipes (
-        user_id INTEGER,
-        recipe_id INTEGER,
-        PRIMARY KEY (user_id, recipe_id),
-        FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
-        FOREIGN KEY (recipe_id) REFERENCES recipes(recipe_id) ON DELETE CASCADE
-);
+        CREATE TRIGGER IF NOT EXISTS recipes_fts_delete AFTER DELETE ON recipes BEGIN
+            DELETE FROM recipes_fts WHERE rowid = OLD.recipe_id;
+        END;
     """)
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS pantry (
-        pantry_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        name TEXT NOT NULL,
-        quantity REAL NOT NULL,
-        unit TEXT,
-        expiration_date DATE NOT NULL,
-        low_threshold REAL DEFAULT 1.0,
-        FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
-);
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS recipes_fts_update
+        AFTER UPDATE OF title, ingredients, instructions ON recipes BEGIN
+            DELETE FROM recipes_fts WHERE rowid = OLD.recipe_id;
+            INSERT INTO recipes_fts (rowid, title, ingredients, instructions)
+            VALUES (NEW.recipe_id, NEW.title, {new_names}, NEW.instructions);
+        END;
     """)
 
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS shopping_list (
-        list_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        name TEXT NOT NULL,
-        quantity REAL,
-        unit TEXT,
-        is_checked BOOLEAN DEFAULT 0,
-        FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
-);
+    # Index the recipes that already exist
+    cursor.execute("DELETE FROM recipes_fts")
+    cursor.execute(f"""
+        INSERT INTO recipes_fts (rowid, title, ingredients, instructions)
+        SELECT recipe_id, title, {_FTS_INGREDIENT_NAMES.format(col='ingredients')}, instructions
+        FROM recipes
     """)
 
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS meal_plan (
-        plan_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        date DATE NOT NULL,
-        recipe_id INTEGER,
-        meal_type TEXT NOT NULL DEFAULT 'Dinner',
-        FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
-        FOREIGN KEY (recipe_id) REFERENCES recipes(recipe_id)
-);
+def _backfill_recipe_ingredients(cursor, batch_size=500):
+    # Give every recipe without structured ingredient rows its rows, parsed from
+    # the JSON/legacy text column. Recipes are read in recipe_id batches so large
+    # databases are never loaded into memory at once.
+    last_id = 0
+    while True:
+        cursor.execute("""
+            SELECT r.recipe_id, r.ingredients
+            FROM recipes r
+            WHERE r.recipe_id > ?
+              AND NOT EXISTS (SELECT 1 FROM recipe_ingredients ri WHERE ri.recipe_id = r.recipe_id)
+            ORDER BY r.recipe_id
+            LIMIT ?
+        """, (last_id, batch_size))
+        batch = cursor.fetchall()
+
+        if not batch:
+            break
+
+        for recipe_id, ingredients in batch:
+            _write_recipe_ingredients(cursor, recipe_id, ingredients)
+
+        last_id = batch[-1][0]
+
+def _add_ingredients_preview(cursor, batch_size=500):
+    # Precomputed "first three ingredients" text for list/grid views
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(recipes)")]
+    if 'ingredients_preview' not in columns:
+        cursor.execute("ALTER TABLE recipes ADD COLUMN ingredients_preview TEXT")
+
+    last_id = 0
+    while True:
+        cursor.execute("""
+            SELECT recipe_id FROM recipes
+            WHERE recipe_id > ?
+            ORDER BY recipe_id
+            LIMIT ?
+        """, (last_id, batch_size))
+        recipe_ids = [row[0] for row in cursor.fetchall()]
+
+        if not recipe_ids:
+            break
+
+        for recipe_id in recipe_ids:
+            cursor.execute("""
+                SELECT name FROM recipe_ingredients
+                WHERE recipe_id = ?
+                ORDER BY order_index
+            """, (recipe_id,))
+            names = [{'name': row[0]} for row in cursor.fetchall()]
+            cursor.execute("""
+                UPDATE recipes SET ingredients_preview = ? WHERE recipe_id = ?
+            """, (build_ingredients_preview(names), recipe_id))
+
+        last_id = recipe_ids[-1]
+
+# Applied in order by run_migrations(). Each step is a list of SQL statements
+# or a function that takes a cursor. Never change a step once it has shipped,
+# add a new one instead.
+MIGRATIONS = [
+    (1, "Create base tables", [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            theme TEXT DEFAULT 'light',
+            units TEXT DEFAULT 'imperial',
+            landing_page TEXT DEFAULT 'dashboard'
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS recipes (
+            recipe_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            ingredients TEXT NOT NULL,
+            instructions TEXT NOT NULL,
+            image_path TEXT,
+            is_public BOOLEAN DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS recipe_ingredients (
+            ingredient_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            recipe_id INTEGER NOT NULL,
+            quantity REAL,
+            unit TEXT,
+            name TEXT NOT NULL,
+            order_index INTEGER DEFAULT 0,
+            FOREIGN KEY (recipe_id) REFERENCES recipes(recipe_id) ON DELETE CASCADE
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS saved_recipes (
+            user_id INTEGER,
+            recipe_id INTEGER,
+            PRIMARY KEY (user_id, recipe_id),
+            FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
+            FOREIGN KEY (recipe_id) REFERENCES recipes(recipe_id) ON DELETE CASCADE
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS pantry (
+            pantry_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            quantity REAL NOT NULL,
+            unit TEXT,
+            expiration_date DATE NOT NULL,
+            low_threshold REAL DEFAULT 1.0,
+            FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS shopping_list (
+            list_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            quantity REAL,
+            unit TEXT,
+            is_checked BOOLEAN DEFAULT 0,
+            FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS meal_plan (
+            plan_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            date DATE NOT NULL,
+            recipe_id INTEGER,
+            meal_type TEXT NOT NULL DEFAULT 'Dinner',
+            FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
+            FOREIGN KEY (recipe_id) REFERENCES recipes(recipe_id)
+        );
+        """,
+    ]),
+    (2, "Add users.landing_page", _add_landing_page_column),
+    (3, "Add per-user lookup indexes", [
+        # get_user_cookbook: WHERE user_id = ? ORDER BY created_at DESC
+        "CREATE INDEX IF NOT EXISTS idx_recipes_user_created ON recipes(user_id, created_at)",
+        # get_user_pantry: WHERE user_id = ? ORDER BY expiration_date
+        "CREATE INDEX IF NOT EXISTS idx_pantry_user_expiration ON pantry(user_id, expiration_date)",
+        # get_user_shopping_list
+        "CREATE INDEX IF NOT EXISTS idx_shopping_list_user ON shopping_list(user_id, is_checked)",
+        # get_user_meal_plan: WHERE user_id = ? (AND date range)
+        "CREATE INDEX IF NOT EXISTS idx_meal_plan_user_date ON meal_plan(user_id, date)",
+        # Foreign key checks when a recipe is deleted
+        "CREATE INDEX IF NOT EXISTS idx_meal_plan_recipe ON meal_plan(recipe_id)",
+        # get_recipe_ingredients: WHERE recipe_id = ? ORDER BY order_index
+        "CREATE INDEX IF NOT EXISTS idx_recipe_ingredients_recipe ON recipe_ingredients(recipe_id, order_index)",
+        # The primary key covers lookups by user; this covers lookups and cascades by recipe
+        "CREATE INDEX IF NOT EXISTS idx_saved_recipes_recipe ON saved_recipes(recipe_id)",
+    ]),
+    (4, "Add public recipe feed index", [
+        # get_public_recipes_page: WHERE is_public = 1 ORDER BY created_at DESC, recipe_id DESC
+        "CREATE INDEX IF NOT EXISTS idx_recipes_public_created ON recipes(is_public, created_at, recipe_id)",
+    ]),
+    (5, "Add full-text recipe search index", _create_recipe_search_index),
+    (6, "Add daily_pick table for Recipe of the Day", [
+        """
+        CREATE TABLE IF NOT EXISTS daily_pick (
+            pick_date DATE PRIMARY KEY,
+            recipe_id INTEGER NOT NULL,
+            FOREIGN KEY (recipe_id) REFERENCES recipes(recipe_id) ON DELETE CASCADE
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_daily_pick_recipe ON daily_pick(recipe_id)",
+    ]),
+    (7, "Backfill recipe_ingredients from recipes.ingredients", _backfill_recipe_ingredients),
+    (8, "Add recipes.ingredients_preview", _add_ingredients_preview),
+    (9, "Add sessions table for remembered sign-ins", [
+        # Only a SHA-256 of each token is stored, so a copy of the database
+        # cannot be used to sign in
+        """
+        CREATE TABLE IF NOT EXISTS sessions (
+            token_hash TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            expires_at TIMESTAMP NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions(user_id, expires_at)",
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version(conn):
+    row = conn.execute("""
+        SELECT name FROM sqlite_master
+        WHERE type = 'table' AND name = 'schema_version'
+    """).fetchone()
+
+    if row is None:
+        return 0
+
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+def run_migrations(conn):
+    """
+    Apply every migration newer than the stored schema version.
+    Each step runs in its own transaction together with its schema_version row.
+    """
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
     """)
-    
-    # Add landing_page column if it doesn't exist (for existing databases)
-    try:
-        cursor.execute("ALTER TABLE users ADD COLUMN landing_page TEXT DEFAULT 'dashboard'")
-    except sqlite3.OperationalError:
-        # Column already exists
-        pass
-    
     conn.commit()
-    
-    conn.close()
+
+    for version, description, step in MIGRATIONS:
+        if version <= get_schema_version(conn):
+            continue
+
+        cursor = conn.cursor()
+        # Take the write lock first, then re-check in case another process got here
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            if version <= get_schema_version(conn):
+                conn.rollback()
+                continue
+
+            if callable(step):
+                step(cursor)
+            else:
+                for statement in step:
+                    cursor.execute(statement)
+
+            cursor.execute("""
+                INSERT INTO schema_version (version, description)
+                VALUES (?, ?)
+            """, (version, description))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    return get_schema_version(conn)
+
+# Set once the schema is known to be current for this process
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+# Creates SQLite Database
+def init_DB():
+    """
+    Create/upgrade the schema. Safe to call on every script rerun: after the
+    first call in a process it returns immediately, and an up-to-date
+    database only costs a read of schema_version.
+    """
+    global _schema_ready
+
+    if _schema_ready:
+        return
+
+    with _schema_lock:
+        if _schema_ready:
+            return
+
+        os.makedirs(os.path.dirname(DB_PATH) or '.', exist_ok=True)
+        conn = get_db_connection()
+
+        try:
+            if get_schema_version(conn) < SCHEMA_VERSION:
+                run_migrations(conn)
+        finally:
+            conn.close()
+
+        _schema_ready = True
 
 # user functions
 def create_user(username, password):
@@ -214,11 +753,14 @@ def create_user(username, password):
     if len(password) < 8:
         return {"error": "Password must be at least 8 characters"}
     
+    try:
+        hashed_password = hash_password(password)
+    except PasswordPoolError as e:
+        return {"error": str(e)}
+
     conn = get_db_connection()
     cursor = conn.cursor()
 
-    hashed_password = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode('utf-8')
-
     try:
         cursor.execute("""
             INSERT INTO users(username, password)
@@ -226,9 +768,9 @@ def create_user(username, password):
         """, (username, hashed_password))
         conn.commit()
         user_id = cursor.lastrowid
+        invalidate_cache(user_id, 'users')
     except sqlite3.IntegrityError:
         #username already exists
-        conn.close()
         return "Username Already Exists"
     finally:
         conn.close()
@@ -254,11 +796,32 @@ def verify_user(username, password):
     stored_user_id = row[0]
     stored_password = row[2]
 
-    if bcrypt.checkpw(password.encode(), stored_password.encode()):
-        return stored_user_id
-    else:
-        return None
+    try:
+        if not check_password(password, stored_password):
+            return None
+
+        # Upgrade hashes made with an older cost factor while we have the password
+        if needs_rehash(stored_password):
+            _rehash_password(stored_user_id, password)
+    except PasswordPoolError as e:
+        return {"error": str(e)}
+
+    return stored_user_id
+
+def _rehash_password(user_id, password):
+    try:
+        hashed_password = hash_password(password)
+    except PasswordPoolError:
+        return  # try again on a later sign-in
+
+    conn = get_db_connection()
+    try:
+        conn.execute("UPDATE users SET password = ? WHERE user_id = ?", (hashed_password, user_id))
+        conn.commit()
+    finally:
+        conn.close()
 
+@_cached('users')
 def get_user(user_id):
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -286,35 +849,99 @@ def get_user(user_id):
 
     return user
 
-def change_username(user_id, current_password, new_username):
-    if not new_username or not new_username.strip():
-        return {"error": "New username cannot be empty"}
-    
-    if len(new_username) < 3:
-        return {"error": "Username must be at least 3 characters"}
-    
-    if len(new_username) > 50:
-        return {"error": "Username must be less than 50 characters"}
-    
+def _check_current_password(user_id, current_password):
+    """None if current_password is the user's password, otherwise an error dict."""
     conn = get_db_connection()
     cursor = conn.cursor()
     
-    # First verify the current password
     cursor.execute("""
         SELECT password FROM users WHERE user_id = ?
     """, (user_id,))
     
     row = cursor.fetchone()
     
+    # Release the connection before bcrypt runs in the worker pool
+    conn.close()
+    
     if row is None:
-        conn.close()
         return {"error": "User not found"}
+
+    if not current_password:
+        return {"error": "Please verify your current password again"}
+
+    try:
+        password_ok = check_password(current_password, row[0])
+    except PasswordPoolError as e:
+        return {"error": str(e)}
+
+    if not password_ok:
+        return {"error": "Current password is incorrect"}
+
+    return None
+
+# Recently verified passwords: token -> (user_id, expiry as time.monotonic()).
+# Kept in this server process only, so they never outlive it.
+_verification_tokens = {}
+_verification_lock = threading.Lock()
+
+def create_verification_token(user_id, current_password):
+    """
+    Check a signed-in user's password once and return a short-lived token that
+    change_username/change_password accept instead of the password.
+    Returns an error dict if the password is wrong.
+    """
+    error = _check_current_password(user_id, current_password)
+    if error:
+        return error
+
+    token = secrets.token_urlsafe(32)
+    now = time.monotonic()
+
+    with _verification_lock:
+        for key, (_, expires) in list(_verification_tokens.items()):
+            if expires <= now:
+                del _verification_tokens[key]
+        _verification_tokens[token] = (user_id, now + VERIFICATION_TOKEN_TTL)
+
+    return token
+
+def _verification_token_valid(token, user_id):
+    if not token:
+        return False
+
+    with _verification_lock:
+        entry = _verification_tokens.get(token)
+
+    return entry is not None and entry[0] == user_id and entry[1] > time.monotonic()
+
+def revoke_verification_token(token):
+    with _verification_lock:
+        _verification_tokens.pop(token, None)
+
+def _revoke_user_verification_tokens(user_id):
+    with _verification_lock:
+        for key, (owner, _) in list(_verification_tokens.items()):
+            if owner == user_id:
+                del _verification_tokens[key]
+
+def change_username(user_id, current_password, new_username, verification_token=None):
+    if not new_username or not new_username.strip():
+        return {"error": "New username cannot be empty"}
     
-    stored_password = row[0]
+    if len(new_username) < 3:
+        return {"error": "Username must be at least 3 characters"}
     
-    if not bcrypt.checkpw(current_password.encode(), stored_password.encode()):
-        conn.close()
-        return {"error": "Current password is incorrect"}
+    if len(new_username) > 50:
+        return {"error": "Username must be less than 50 characters"}
+    
+    # A fresh verification token saves checking the password again
+    if not _verification_token_valid(verification_token, user_id):
+        error = _check_current_password(user_id, current_password)
+        if error:
+            return error
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
     
     # Check if new username already exists
     cursor.execute("""
@@ -331,44 +958,39 @@ def change_username(user_id, current_password, new_username):
             UPDATE users SET username = ? WHERE user_id = ?
         """, (new_username, user_id))
         conn.commit()
+        # Usernames are shown on public and saved recipes of every user
+        invalidate_cache(None, 'users')
     except sqlite3.IntegrityError:
-        conn.close()
         return {"error": "Username already taken"}
     finally:
         conn.close()
     
+    revoke_verification_token(verification_token)
+    
     return user_id
 
 
-def change_password(user_id, current_password, new_password):
+def change_password(user_id, current_password, new_password, verification_token=None):
     if not new_password:
         return {"error": "New password cannot be empty"}
     
     if len(new_password) < 8:
         return {"error": "New password must be at least 8 characters"}
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # First verify the current password
-    cursor.execute("""
-        SELECT password FROM users WHERE user_id = ?
-    """, (user_id,))
-    
-    row = cursor.fetchone()
-    
-    if row is None:
-        conn.close()
-        return {"error": "User not found"}
-    
-    stored_password = row[0]
-    
-    if not bcrypt.checkpw(current_password.encode(), stored_password.encode()):
-        conn.close()
-        return {"error": "Current password is incorrect"}
+    # A fresh verification token saves checking the password again
+    if not _verification_token_valid(verification_token, user_id):
+        error = _check_current_password(user_id, current_password)
+        if error:
+            return error
     
     # Hash and update the new password
-    hashed_password = bcrypt.hashpw(new_password.encode(), bcrypt.gensalt()).decode('utf-8')
+    try:
+        hashed_password = hash_password(new_password)
+    except PasswordPoolError as e:
+        return {"error": str(e)}
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
     
     cursor.execute("""
         UPDATE users SET password = ? WHERE user_id = ?
@@ -377,9 +999,153 @@ def change_password(user_id, current_password, new_password):
     conn.commit()
     conn.close()
     
+    # Verifications and remembered sign-ins made with the old password no longer count
+    _revoke_user_verification_tokens(user_id)
+    revoke_user_sessions(user_id)
+    
     return user_id
 
+#session functions ("remember me")
+def _hash_session_token(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def create_session(user_id):
+    """
+    Start a remembered sign-in for a user and return its token (to be kept
+    by the browser). Only a hash of the token is stored.
+    """
+    token = secrets.token_urlsafe(32)
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        # Drop this user's expired sessions while we are here
+        cursor.execute("""
+            DELETE FROM sessions
+            WHERE user_id = ? AND expires_at <= datetime('now')
+        """, (user_id,))
+        cursor.execute("""
+            INSERT INTO sessions (token_hash, user_id, expires_at)
+            VALUES (?, ?, datetime('now', ?))
+        """, (_hash_session_token(token), user_id, f"{SESSION_TTL_DAYS:+d} days"))
+        conn.commit()
+    finally:
+        conn.close()
+
+    return token
+
+def validate_session(token):
+    """
+    {'user_id', 'username'} for a valid, unexpired session token, otherwise
+    None. A primary key lookup, no password hashing.
+    """
+    if not token:
+        return None
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        SELECT u.user_id, u.username
+        FROM sessions s
+        JOIN users u ON s.user_id = u.user_id
+        WHERE s.token_hash = ? AND s.expires_at > datetime('now')
+    """, (_hash_session_token(token),))
+
+    row = cursor.fetchone()
+    conn.close()
+
+    if row is None:
+        return None
+
+    return {
+        'user_id': row[0],
+        'username': row[1]
+    }
+
+def revoke_session(token):
+    if not token:
+        return
+
+    conn = get_db_connection()
+    try:
+        conn.execute("DELETE FROM sessions WHERE token_hash = ?", (_hash_session_token(token),))
+        conn.commit()
+    finally:
+        conn.close()
+
+def revoke_user_sessions(user_id):
+    """Sign a user out of every remembered browser."""
+    conn = get_db_connection()
+    try:
+        conn.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+        conn.commit()
+    finally:
+        conn.close()
+
 #recipe functions
+def parse_ingredients(ingredients):
+    """
+    Normalize ingredients to a list of {'quantity', 'unit', 'name'} dicts.
+    Accepts a list of dicts, a JSON string, or legacy newline-separated text
+    (each line becomes a name-only ingredient).
+    """
+    if isinstance(ingredients, str):
+        try:
+            parsed = json.loads(ingredients)
+        except (json.JSONDecodeError, ValueError):
+            parsed = None
+
+        if isinstance(parsed, list):
+            ingredients = parsed
+        else:
+            return [
+                {'quantity': None, 'unit': None, 'name': line.strip()}
+                for line in ingredients.split('\n') if line.strip()
+            ]
+
+    parsed_ingredients = []
+    for ing in ingredients or []:
+        if isinstance(ing, dict) and ing.get('name'):
+            parsed_ingredients.append({
+                'quantity': ing.get('quantity'),
+                'unit': ing.get('unit'),
+                'name': ing.get('name')
+            })
+        elif isinstance(ing, str) and ing.strip():
+            parsed_ingredients.append({'quantity': None, 'unit': None, 'name': ing.strip()})
+
+    return parsed_ingredients
+
+def build_ingredients_preview(ingredients):
+    # "flour, eggs, milk ..." - the first three ingredient names
+    names = [ing['name'] for ing in ingredients[:3] if ing.get('name')]
+    preview = ', '.join(names)
+    if len(ingredients) > 3:
+        preview += " ..."
+    return preview
+
+def _write_recipe_ingredients(cursor, recipe_id, ingredients):
+    # Replace the structured ingredient rows for a recipe (caller commits)
+    cursor.execute("""
+        DELETE FROM recipe_ingredients 
+        WHERE recipe_id = ?
+    """, (recipe_id,))
+
+    cursor.executemany("""
+        INSERT INTO recipe_ingredients (recipe_id, quantity, unit, name, order_index)
+        VALUES (?, ?, ?, ?, ?)
+    """, [
+        (recipe_id, ing['quantity'], ing['unit'], ing['name'], idx)
+        for idx, ing in enumerate(parse_ingredients(ingredients))
+    ])
+
+def _update_ingredients_preview(cursor, recipe_id, ingredients):
+    cursor.execute("""
+        UPDATE recipes SET ingredients_preview = ? WHERE recipe_id = ?
+    """, (build_ingredients_preview(parse_ingredients(ingredients)), recipe_id))
+
 def create_recipe(user_id, title, ingredients, instructions, image_path, is_public):
     if not title or not title.strip():
         return {"error": "Title cannot be empty"}
@@ -401,78 +1167,115 @@ def create_recipe(user_id, title, ingredients, instructions, image_path, is_publ
         # Legacy string format
         ingredients_json = ingredients
 
-    cursor.execute("""
-        INSERT INTO recipes (user_id, title, ingredients, instructions, image_path, is_public)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (user_id, title, ingredients_json, instructions, image_path, is_public))
+    try:
+        cursor.execute("""
+            INSERT INTO recipes (user_id, title, ingredients, instructions, image_path, is_public)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (user_id, title, ingredients_json, instructions, image_path, is_public))
 
-    conn.commit()
-    
-    recipe_id = cursor.lastrowid
+        recipe_id = cursor.lastrowid
 
-    conn.close()
+        # recipe_ingredients is the source of truth for structured ingredients;
+        # it is written in the same transaction as the recipe row
+        _write_recipe_ingredients(cursor, recipe_id, ingredients)
+        _update_ingredients_preview(cursor, recipe_id, ingredients)
+
+        conn.commit()
+        invalidate_cache(None, 'recipes')
+    finally:
+        conn.close()
 
     return recipe_id
 
+@_cached('recipes', per_user=False)
 def get_recipe(recipe_id):
     conn = get_db_connection()
     cursor = conn.cursor()
+    cursor.row_factory = Recipe.from_row
 
     cursor.execute("""
-        SELECT recipe_id, user_id, title, ingredients, instructions, image_path, is_public, created_at
+        SELECT recipe_id, user_id, title, ingredients, instructions, image_path, is_public, created_at,
+               NULL AS username
         FROM recipes
         WHERE recipe_id = ?
     """, (recipe_id,))
 
-    row = cursor.fetchone()
+    recipe = cursor.fetchone()
 
     conn.close()
 
-    if row is None:
-        return None
-
-    recipe = {
-        'recipe_id': row[0],
-        'user_id': row[1],
-        'title': row[2],
-        'ingredients': row[3],
-        'instructions': row[4],
-        'image_path': row[5],
-        'is_public': bool(row[6]),
-        'created_at': row[7]
-    }
-
     return recipe
 
+@_cached('recipes')
 def get_user_cookbook(user_id):
     conn = get_db_connection()
     cursor = conn.cursor()
+    cursor.row_factory = Recipe.from_row
     
     cursor.execute("""
-        SELECT recipe_id, title, ingredients, instructions, image_path, is_public, created_at
+        SELECT recipe_id, user_id, title, ingredients, instructions, image_path, is_public, created_at,
+               NULL AS username
         FROM recipes
         WHERE user_id = ?
         ORDER BY created_at DESC
     """, (user_id,))
     
-    rows = cursor.fetchall()
+    recipes = cursor.fetchall()
     
     conn.close()
     
-    recipes = []
-    for row in rows:
-        recipes.append({
-            'recipe_id': row[0],
-            'title': row[1],
-            'ingredients': row[2],
-            'instructions': row[3],
-            'image_path': row[4],
-            'is_public': bool(row[5]),
-            'created_at': row[6]
-        })
+    return recipes
+
+@_cached('recipes')
+def get_user_cookbook_summaries(user_id):
+    """Like get_user_cookbook, but only the fields the Cookbook grid shows."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.row_factory = RecipeSummary.from_row
+    
+    cursor.execute("""
+        SELECT recipe_id, user_id, title, COALESCE(ingredients_preview, ''),
+               image_path, is_public, created_at, NULL AS username
+        FROM recipes
+        WHERE user_id = ?
+        ORDER BY created_at DESC
+    """, (user_id,))
+    
+    recipes = cursor.fetchall()
+    
+    conn.close()
     
     return recipes
 
+@_cached('recipes', 'saved_recipes')
+def get_recipe_options(user_id):
+    """
+    id and title of every recipe a user can plan with: their own recipes
+    followed by the public recipes they saved (each newest first).
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("""
+        SELECT recipe_id, title FROM (
+            SELECT recipe_id, title, created_at, 0 AS source
+            FROM recipes
+            WHERE user_id = ?
+            UNION ALL
+            SELECT r.recipe_id, r.title, r.created_at, 1 AS source
+            FROM recipes r
+            JOIN saved_recipes sr ON r.recipe_id = sr.recipe_id
+            WHERE sr.user_id = ?
+        )
+        ORDER BY source, created_at DESC
+    """, (user_id, user_id))
+    
+    rows = cursor.fetchall()
+    
+    conn.close()
+    
+    return [{'recipe_id': row[0], 'title': row[1]} for row in rows]
+
 def update_user_recipes(recipe_id, title, ingredients, instructions, image_path, is_public):
     try:
         conn = get_db_connection()
@@ -497,23 +1300,13 @@ def update_user_recipes(recipe_id, title, ingredients, instructions, image_path,
             WHERE recipe_id = ?
         """, (title, ingredients_json, instructions, image_path, is_public, recipe_id))
         
-        # If ingredients is a structured list, also update the recipe_ingredients table
-        if isinstance(ingredients, list):
-            # Delete existing structured ingredients
-            cursor.execute("""
-                DELETE FROM recipe_ingredients 
-                WHERE recipe_id = ?
-            """, (recipe_id,))
-            
-            # Insert new structured ingredients
-            for idx, ing in enumerate(ingredients):
-                cursor.execute("""
-                    INSERT INTO recipe_ingredients (recipe_id, quantity, unit, name, order_index)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (recipe_id, ing.get('quantity'), ing.get('unit'), ing.get('name'), idx))
+        # Keep the recipe_ingredients table (the source of truth) in step
+        _write_recipe_ingredients(cursor, recipe_id, ingredients)
+        _update_ingredients_preview(cursor, recipe_id, ingredients)
         
         conn.commit()
         conn.close()
+        invalidate_cache(None, 'recipes')
         
         return recipe_id
         
@@ -537,6 +1330,8 @@ def delete_recipe(recipe_id):
 
     conn.close()
 
+    invalidate_cache(None, 'recipes')
+
     return "Recipe Successfully Deleted"
 
 def delete_user_recipe(recipe_id, user_id=None):
@@ -567,6 +1362,7 @@ def delete_user_recipe(recipe_id, user_id=None):
         
         conn.commit()
         conn.close()
+        invalidate_cache(None, 'recipes')
         
         return "Recipe Successfully Deleted"
         
@@ -574,9 +1370,11 @@ def delete_user_recipe(recipe_id, user_id=None):
         conn.close()
         return {"error": f"Failed to delete recipe: {str(e)}"}
 
+@_cached('recipes', 'users', per_user=False)
 def get_all_public_recipes():
     conn = get_db_connection()
     cursor = conn.cursor()
+    cursor.row_factory = Recipe.from_row
     
     cursor.execute("""
         SELECT r.recipe_id, r.user_id, r.title, r.ingredients, r.instructions, 
@@ -587,61 +1385,239 @@ def get_all_public_recipes():
         ORDER BY r.created_at DESC
     """)
     
-    rows = cursor.fetchall()
+    recipes = cursor.fetchall()
     
     conn.close()
     
-    recipes = []
-    for row in rows:
-        recipes.append({
-            'recipe_id': row[0],
-            'user_id': row[1],
-            'title': row[2],
-            'ingredients': row[3],
-            'instructions': row[4],
-            'image_path': row[5],
-            'is_public': bool(row[6]),
-            'created_at': row[7],
-            'username': row[8]
-        })
-    
     return recipes
 
-def get_random_public_recipe():
+def _like_pattern(text):
+    # "contains" pattern with LIKE wildcards escaped so the text matches literally
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+@_cached('recipes', 'users', per_user=False)
+def get_public_recipes_page(limit=12, cursor=None):
+    """
+    One page of public recipe summaries (no ingredients/instructions text),
+    newest first, using keyset pagination.
+    cursor is the (created_at, recipe_id) of the last recipe on the previous
+    page (None for the first page). Returns (recipes, next_cursor), where
+    next_cursor is None when there are no more recipes.
+    """
     conn = get_db_connection()
+    cursor_db = conn.cursor()
+    cursor_db.row_factory = RecipeSummary.from_row
+
+    query = """
+        SELECT r.recipe_id, r.user_id, r.title, COALESCE(r.ingredients_preview, ''),
+               r.image_path, r.is_public, r.created_at, u.username
+        FROM recipes r
+        JOIN users u ON r.user_id = u.user_id
+        WHERE r.is_public = 1
+    """
+    params = []
+
+    if cursor is not None:
+        query += " AND (r.created_at < ? OR (r.created_at = ? AND r.recipe_id < ?))"
+        params += [cursor[0], cursor[0], cursor[1]]
+
+    # Fetch one extra row to find out whether another page exists
+    query += " ORDER BY r.created_at DESC, r.recipe_id DESC LIMIT ?"
+    params.append(limit + 1)
+
+    cursor_db.execute(query, params)
+
+    rows = cursor_db.fetchall()
+
+    conn.close()
+
+    recipes = rows[:limit]
+
+    next_cursor = None
+    if len(rows) > limit and recipes:
+        next_cursor = (recipes[-1].created_at, recipes[-1].recipe_id)
+
+    return recipes, next_cursor
+
+def _has_search_index(conn):
+    row = conn.execute("""
+        SELECT 1 FROM sqlite_master
+        WHERE type = 'table' AND name = 'recipes_fts'
+    """).fetchone()
+    return row is not None
+
+# Set when this process's SQLite has no FTS5, so the index is not retried per search
+_fts_unavailable = False
+
+def _ensure_search_index(conn):
+    """
+    True if the full-text index exists, creating it first if needed (migration
+    5 is recorded even when the SQLite it ran on had no FTS5).
+    """
+    global _fts_unavailable
+
+    if _has_search_index(conn):
+        return True
+    if _fts_unavailable:
+        return False
+
     cursor = conn.cursor()
-    
-    # Get today's date as a seed
-    today = date.today()
-    seed = int(today.strftime('%Y%m%d'))
-    
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        # Re-check under the write lock in case another process built it
+        if not _has_search_index(conn):
+            _create_recipe_search_index(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    if not _has_search_index(conn):
+        _fts_unavailable = True
+        return False
+    return True
+
+def _fts_query(search):
+    # Turn free text into an FTS5 query: every word must match, as a prefix.
+    # Words are quoted so FTS operators and punctuation in the input are literal.
+    words = re.findall(r'\w+', search)
+    return ' '.join(f'"{word}"*' for word in words)
+
+# snippet() marks matches with these; the text around them is user content,
+# so it is escaped before the markers become <mark> tags
+_SNIPPET_START = '\x02'
+_SNIPPET_END = '\x03'
+
+def _snippet_html(snippet):
+    if snippet is None:
+        return None
+    escaped = html.escape(snippet)
+    return escaped.replace(_SNIPPET_START, '<mark>').replace(_SNIPPET_END, '</mark>')
+
+@_cached('recipes', 'users', per_user=False)
+def search_public_recipes(search, limit=12, offset=0):
+    """
+    Ranked full-text search over public recipe titles, ingredient names and
+    instructions. Returns (recipe summaries, has_more); each has a 'snippet'
+    (HTML-escaped) with the matched words wrapped in <mark> tags. Title
+    matches rank highest.
+    """
+    fts_query = _fts_query(search or '')
+    if not fts_query:
+        return [], False
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.row_factory = RecipeSearchResult.from_row
+
+    if _ensure_search_index(conn):
+        cursor.execute("""
+            SELECT r.recipe_id, r.user_id, r.title, COALESCE(r.ingredients_preview, ''),
+                   r.image_path, r.is_public, r.created_at, u.username,
+                   snippet(recipes_fts, -1, ?, ?, '…', 12)
+            FROM recipes_fts
+            JOIN recipes r ON r.recipe_id = recipes_fts.rowid
+            JOIN users u ON r.user_id = u.user_id
+            WHERE recipes_fts MATCH ? AND r.is_public = 1
+            ORDER BY bm25(recipes_fts, 10.0, 4.0, 1.0)
+            LIMIT ? OFFSET ?
+        """, (_SNIPPET_START, _SNIPPET_END, fts_query, limit + 1, offset))
+    else:
+        # No FTS5 in this SQLite build: plain title search
+        cursor.execute("""
+            SELECT r.recipe_id, r.user_id, r.title, COALESCE(r.ingredients_preview, ''),
+                   r.image_path, r.is_public, r.created_at, u.username, NULL
+            FROM recipes r
+            JOIN users u ON r.user_id = u.user_id
+            WHERE r.is_public = 1 AND r.title LIKE ? ESCAPE '\\'
+            ORDER BY r.created_at DESC, r.recipe_id DESC
+            LIMIT ? OFFSET ?
+        """, (_like_pattern(search), limit + 1, offset))
+
+    rows = [row._replace(snippet=_snippet_html(row.snippet)) for row in cursor.fetchall()]
+
+    conn.close()
+
+    return rows[:limit], len(rows) > limit
+
+# Today's Recipe of the Day, shared by every session in this process ({date: recipe_id})
+_daily_pick_cache = {}
+_daily_pick_lock = threading.Lock()
+
+def _get_public_recipe_with_author(cursor, recipe_id):
+    cursor.row_factory = Recipe.from_row
     cursor.execute("""
         SELECT r.recipe_id, r.user_id, r.title, r.ingredients, r.instructions, 
                r.image_path, r.is_public, r.created_at, u.username
         FROM recipes r
         JOIN users u ON r.user_id = u.user_id
-        WHERE r.is_public = 1
-        ORDER BY (r.recipe_id * ?) % 1000000
+        WHERE r.recipe_id = ? AND r.is_public = 1
+    """, (recipe_id,))
+    
+    return cursor.fetchone()
+
+def _pick_daily_recipe(conn, pick_date):
+    # Score every public recipe with a date seed; runs once per day, not per render
+    cursor = conn.cursor()
+    seed = int(pick_date.replace('-', ''))
+    
+    cursor.execute("""
+        SELECT recipe_id
+        FROM recipes
+        WHERE is_public = 1
+        ORDER BY (recipe_id * ?) % 1000000
         LIMIT 1
     """, (seed,))
     
     row = cursor.fetchone()
-    conn.close()
-    
     if row is None:
         return None
     
-    recipe = {
-        'recipe_id': row[0],
-        'user_id': row[1],
-        'title': row[2],
-        'ingredients': row[3],
-        'instructions': row[4],
-        'image_path': row[5],
-        'is_public': bool(row[6]),
-        'created_at': row[7],
-        'username': row[8]
-    }
+    cursor.execute("DELETE FROM daily_pick WHERE pick_date < ?", (pick_date,))
+    cursor.execute("""
+        INSERT OR REPLACE INTO daily_pick (pick_date, recipe_id)
+        VALUES (?, ?)
+    """, (pick_date, row[0]))
+    conn.commit()
+    
+    return row[0]
+
+def get_random_public_recipe():
+    """
+    Recipe of the Day. The pick is made once per day, stored in daily_pick and
+    remembered by the process; the recipe itself is served from the read cache,
+    so a render does no database work until recipes or users change.
+    A new recipe is picked if today's one is deleted or made private.
+    """
+    return _get_daily_recipe(date.today().isoformat())
+
+@_cached('recipes', 'users', per_user=False)
+def _get_daily_recipe(today):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    try:
+        with _daily_pick_lock:
+            recipe_id = _daily_pick_cache.get(today)
+        
+        if recipe_id is None:
+            cursor.execute("SELECT recipe_id FROM daily_pick WHERE pick_date = ?", (today,))
+            row = cursor.fetchone()
+            recipe_id = row[0] if row else None
+        
+        recipe = _get_public_recipe_with_author(cursor, recipe_id) if recipe_id is not None else None
+        
+        if recipe is None:
+            recipe_id = _pick_daily_recipe(conn, today)
+            recipe = _get_public_recipe_with_author(cursor, recipe_id) if recipe_id is not None else None
+        
+        with _daily_pick_lock:
+            _daily_pick_cache.clear()
+            if recipe is not None:
+                _daily_pick_cache[today] = recipe_id
+    finally:
+        conn.close()
     
     return recipe
 
@@ -655,8 +1631,8 @@ def save_public_recipe(user_id, recipe_id):
             VALUES (?, ?)
         """, (user_id, recipe_id))
         conn.commit()
+        invalidate_cache(user_id, 'saved_recipes')
     except sqlite3.IntegrityError:
-        conn.close()
         return {"error": "Recipe already saved"}
     finally:
         conn.close()
@@ -674,12 +1650,16 @@ def unsave_public_recipe(user_id, recipe_id):
     
     conn.commit()
     conn.close()
+
+    invalidate_cache(user_id, 'saved_recipes')
     
     return "Recipe unsaved successfully"
 
+@_cached('recipes', 'saved_recipes', 'users')
 def get_saved_public_recipes(user_id):
     conn = get_db_connection()
     cursor = conn.cursor()
+    cursor.row_factory = Recipe.from_row
     
     cursor.execute("""
         SELECT r.recipe_id, r.user_id, r.title, r.ingredients, r.instructions, 
@@ -691,26 +1671,36 @@ def get_saved_public_recipes(user_id):
         ORDER BY r.created_at DESC
     """, (user_id,))
     
-    rows = cursor.fetchall()
+    recipes = cursor.fetchall()
     
     conn.close()
     
-    recipes = []
-    for row in rows:
-        recipes.append({
-            'recipe_id': row[0],
-            'user_id': row[1],
-            'title': row[2],
-            'ingredients': row[3],
-            'instructions': row[4],
-            'image_path': row[5],
-            'is_public': bool(row[6]),
-            'created_at': row[7],
-            'username': row[8]
-        })
+    return recipes
+
+@_cached('recipes', 'saved_recipes', 'users')
+def get_saved_recipe_summaries(user_id):
+    """Like get_saved_public_recipes, but only the fields the Cookbook grid shows."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.row_factory = RecipeSummary.from_row
+    
+    cursor.execute("""
+        SELECT r.recipe_id, r.user_id, r.title, COALESCE(r.ingredients_preview, ''),
+               r.image_path, r.is_public, r.created_at, u.username
+        FROM recipes r
+        JOIN saved_recipes sr ON r.recipe_id = sr.recipe_id
+        JOIN users u ON r.user_id = u.user_id
+        WHERE sr.user_id = ?
+        ORDER BY r.created_at DESC
+    """, (user_id,))
+    
+    recipes = cursor.fetchall()
+    
+    conn.close()
     
     return recipes
 
+@_cached('saved_recipes', 'recipes')
 def is_recipe_saved(user_id, recipe_id):
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -725,6 +1715,7 @@ def is_recipe_saved(user_id, recipe_id):
     
     return result is not None
 
+@_cached('recipes', per_user=False)
 def get_recipe_ingredients(recipe_id, target_units=None):
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -797,11 +1788,15 @@ def create_pantry_item(user_id, name, quantity, unit, expiration_date, low_thres
 
     conn.close()
 
+    invalidate_cache(user_id, 'pantry')
+
     return pantry_id
 
+@_cached('pantry')
 def get_user_pantry(user_id):
     conn = get_db_connection()
     cursor = conn.cursor()
+    cursor.row_factory = PantryItem.from_row
     
     cursor.execute("""
         SELECT pantry_id, name, quantity, unit, expiration_date, low_threshold
@@ -810,27 +1805,18 @@ def get_user_pantry(user_id):
         ORDER BY expiration_date ASC
     """, (user_id,))
     
-    rows = cursor.fetchall()
+    pantry = cursor.fetchall()
     
     conn.close()
     
-    pantry = []
-    for row in rows:
-        pantry.append({
-            'pantry_id': row[0],
-            'name': row[1],
-            'quantity': row[2],
-            'unit': row[3],
-            'expiration_date': row[4],
-            'low_threshold': row[5]
-        })
-    
     return pantry
 
 def delete_pantry_item(pantry_id):
     conn = get_db_connection()
     cursor = conn.cursor()
 
+    user_id = _owner_of(cursor, 'pantry', 'pantry_id', pantry_id)
+
     cursor.execute("""
         DELETE FROM pantry
         WHERE pantry_id = ?
@@ -840,12 +1826,16 @@ def delete_pantry_item(pantry_id):
 
     conn.close()
 
+    invalidate_cache(user_id, 'pantry')
+
     return "Item Successfully Removed"
 
 def update_pantry_item(pantry_id, name, quantity, unit, expiration_date, low_threshold):
     conn = get_db_connection()
     cursor = conn.cursor()
 
+    user_id = _owner_of(cursor, 'pantry', 'pantry_id', pantry_id)
+
     cursor.execute("""
         UPDATE pantry
         SET name = ?, 
@@ -860,6 +1850,8 @@ def update_pantry_item(pantry_id, name, quantity, unit, expiration_date, low_thr
 
     conn.close()
 
+    invalidate_cache(user_id, 'pantry')
+
     return pantry_id
 
 #shopping list functions
@@ -894,12 +1886,16 @@ def create_shopping_list_item(user_id, name, quantity, unit, is_checked):
     list_id = cursor.lastrowid
     
     conn.close()
+
+    invalidate_cache(user_id, 'shopping_list')
     
     return list_id
 
+@_cached('shopping_list')
 def get_user_shopping_list(user_id):
     conn = get_db_connection()
     cursor = conn.cursor()
+    cursor.row_factory = ShoppingItem.from_row
     
     cursor.execute("""
         SELECT list_id, name, quantity, unit, is_checked
@@ -907,26 +1903,18 @@ def get_user_shopping_list(user_id):
         WHERE user_id = ?
     """, (user_id,))
     
-    rows = cursor.fetchall()
+    shopping_list = cursor.fetchall()
     
     conn.close()
     
-    shopping_list = []
-    for row in rows:
-        shopping_list.append({
-            'list_id': row[0],
-            'name': row[1],
-            'quantity': row[2],
-            'unit': row[3],
-            'is_checked': bool(row[4])
-        })
-    
     return shopping_list
 
 def delete_shopping_list_item(list_id):
     conn = get_db_connection()
     cursor = conn.cursor()
 
+    user_id = _owner_of(cursor, 'shopping_list', 'list_id', list_id)
+
     cursor.execute("""
         DELETE FROM shopping_list
         WHERE list_id = ?
@@ -936,12 +1924,16 @@ def delete_shopping_list_item(list_id):
 
     conn.close()
 
+    invalidate_cache(user_id, 'shopping_list')
+
     return "Item Successfully Removed"
 
 def update_shopping_list_item(list_id, name, quantity, unit, is_checked):
     conn = get_db_connection()
     cursor = conn.cursor()
 
+    user_id = _owner_of(cursor, 'shopping_list', 'list_id', list_id)
+
     cursor.execute("""
         UPDATE shopping_list
         SET name = ?, 
@@ -955,8 +1947,62 @@ def update_shopping_list_item(list_id, name, quantity, unit, is_checked):
 
     conn.close()
 
+    invalidate_cache(user_id, 'shopping_list')
+
     return list_id
 
+#dashboard functions
+@_cached('pantry', 'shopping_list')
+def get_dashboard_summary(user_id, limit=5):
+    """
+    Everything the dashboard previews, using a single connection: the first
+    `limit` pantry items by expiration date, the first `limit` unchecked
+    shopping list items, and the totals shown next to them.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        SELECT
+            (SELECT COUNT(*) FROM pantry WHERE user_id = ?),
+            (SELECT COUNT(*) FROM shopping_list WHERE user_id = ?),
+            (SELECT COUNT(*) FROM shopping_list WHERE user_id = ? AND is_checked = 0)
+    """, (user_id, user_id, user_id))
+
+    pantry_total, shopping_total, shopping_unchecked_total = cursor.fetchone()
+
+    cursor.row_factory = PantryItem.from_row
+    cursor.execute("""
+        SELECT pantry_id, name, quantity, unit, expiration_date, low_threshold
+        FROM pantry
+        WHERE user_id = ?
+        ORDER BY expiration_date ASC
+        LIMIT ?
+    """, (user_id, limit))
+
+    pantry_items = cursor.fetchall()
+
+    cursor.row_factory = ShoppingItem.from_row
+    cursor.execute("""
+        SELECT list_id, name, quantity, unit, is_checked
+        FROM shopping_list
+        WHERE user_id = ? AND is_checked = 0
+        ORDER BY list_id
+        LIMIT ?
+    """, (user_id, limit))
+
+    shopping_items = cursor.fetchall()
+
+    conn.close()
+
+    return {
+        'pantry_items': pantry_items,
+        'pantry_total': pantry_total,
+        'shopping_items': shopping_items,
+        'shopping_total': shopping_total,
+        'shopping_unchecked_total': shopping_unchecked_total
+    }
+
 #meal plan functions
 def create_meal_plan(user_id, date, recipe_id, meal_type):
     try:
@@ -990,38 +2036,118 @@ def create_meal_plan(user_id, date, recipe_id, meal_type):
     plan_id = cursor.lastrowid
     
     conn.close()
+
+    invalidate_cache(user_id, 'meal_plan')
     
     return plan_id
 
+def _meal_plan_range_filter(start_date, end_date, column='date'):
+    # Extra WHERE clause and params for an optional inclusive date range
+    clause = ""
+    params = []
+    if start_date is not None:
+        clause += f" AND {column} >= ?"
+        params.append(start_date)
+    if end_date is not None:
+        clause += f" AND {column} <= ?"
+        params.append(end_date)
+    return clause, params
+
+@_cached('meal_plan', 'recipes')
 def get_user_meal_plan(user_id):
+    """Every meal plan row of a user. The pages use get_meal_plan_entries instead."""
     conn = get_db_connection()
     cursor = conn.cursor()
-    
+    cursor.row_factory = MealPlanEntry.from_row
+
     cursor.execute("""
-        SELECT plan_id, date, recipe_id, meal_type
+        SELECT plan_id, date, meal_type, recipe_id,
+               NULL AS recipe_title, NULL AS image_path, NULL AS is_public
         FROM meal_plan
         WHERE user_id = ?
     """, (user_id,))
     
-    rows = cursor.fetchall()
+    meal_plan = cursor.fetchall()
     
     conn.close()
     
-    meal_plan = []
-    for row in rows:
-        meal_plan.append({
-            'plan_id': row[0],
-            'date': row[1],
-            'recipe_id': row[2],
-            'meal_type': row[3]
-        })
-    
     return meal_plan
 
+@_cached('meal_plan', 'recipes')
+def get_meal_plan_entries(user_id, start_date=None, end_date=None, include_details=False,
+                          limit=None, offset=0):
+    """
+    Meal plan rows joined with their recipe title in a single query.
+    start_date/end_date ('YYYY-MM-DD', inclusive) limit the range, limit/offset
+    page through it; include_details also returns the recipe's image_path and
+    is_public flag.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.row_factory = MealPlanEntry.from_row
+
+    columns = "mp.plan_id, mp.date, mp.meal_type, r.recipe_id, r.title"
+    if include_details:
+        columns += ", r.image_path, r.is_public"
+    else:
+        columns += ", NULL, NULL"
+
+    range_clause, range_params = _meal_plan_range_filter(start_date, end_date, column='mp.date')
+
+    query = f"""
+        SELECT {columns}
+        FROM meal_plan mp
+        JOIN recipes r ON mp.recipe_id = r.recipe_id
+        WHERE mp.user_id = ?{range_clause}
+        ORDER BY mp.date,
+                 CASE mp.meal_type
+                     WHEN 'Breakfast' THEN 0
+                     WHEN 'Lunch' THEN 1
+                     WHEN 'Dinner' THEN 2
+                     WHEN 'Snack' THEN 3
+                     ELSE 4
+                 END,
+                 mp.plan_id
+    """
+    params = [user_id] + range_params
+
+    if limit is not None:
+        query += " LIMIT ? OFFSET ?"
+        params += [limit, offset]
+
+    cursor.execute(query, params)
+
+    entries = cursor.fetchall()
+
+    conn.close()
+
+    return entries
+
+@_cached('meal_plan', 'recipes')
+def count_meal_plan_entries(user_id, start_date=None, end_date=None):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    range_clause, range_params = _meal_plan_range_filter(start_date, end_date, column='mp.date')
+
+    cursor.execute(f"""
+        SELECT COUNT(*)
+        FROM meal_plan mp
+        JOIN recipes r ON mp.recipe_id = r.recipe_id
+        WHERE mp.user_id = ?{range_clause}
+    """, [user_id] + range_params)
+
+    count = cursor.fetchone()[0]
+    conn.close()
+
+    return count
+
 def delete_recipe_from_meal_plan(plan_id):
     conn = get_db_connection()
     cursor = conn.cursor()
 
+    user_id = _owner_of(cursor, 'meal_plan', 'plan_id', plan_id)
+
     cursor.execute("""
         DELETE FROM meal_plan
         WHERE plan_id = ?
@@ -1031,12 +2157,16 @@ def delete_recipe_from_meal_plan(plan_id):
 
     conn.close()
 
+    invalidate_cache(user_id, 'meal_plan')
+
     return "Recipe Successfully Removed"
 
 def update_meal_plan(plan_id, date, recipe_id, meal_type):
     conn = get_db_connection()
     cursor = conn.cursor()
 
+    user_id = _owner_of(cursor, 'meal_plan', 'plan_id', plan_id)
+
     cursor.execute("""
         UPDATE meal_plan
         SET date = ?, 
@@ -1049,9 +2179,12 @@ def update_meal_plan(plan_id, date, recipe_id, meal_type):
 
     conn.close()
 
+    invalidate_cache(user_id, 'meal_plan')
+
     return plan_id
 
 #settings page functions
+@_cached('users')
 def get_user_settings(user_id):
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -1074,6 +2207,32 @@ def get_user_settings(user_id):
         'landing_page': row[2] if row[2] else 'dashboard'
     }
 
+@_cached('recipes', 'saved_recipes', 'pantry', 'shopping_list', 'meal_plan')
+def get_user_stats(user_id):
+    """Counts shown on the Settings page, from a single query."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        SELECT
+            (SELECT COUNT(*) FROM recipes WHERE user_id = ?),
+            (SELECT COUNT(*) FROM saved_recipes WHERE user_id = ?),
+            (SELECT COUNT(*) FROM pantry WHERE user_id = ?),
+            (SELECT COUNT(*) FROM shopping_list WHERE user_id = ?),
+            (SELECT COUNT(*) FROM meal_plan WHERE user_id = ?)
+    """, (user_id, user_id, user_id, user_id, user_id))
+
+    row = cursor.fetchone()
+    conn.close()
+
+    return {
+        'recipes': row[0],
+        'saved_recipes': row[1],
+        'pantry_items': row[2],
+        'shopping_items': row[3],
+        'meal_plans': row[4]
+    }
+
 def update_user_settings(user_id, theme, landing_page='dashboard'):
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -1086,6 +2245,8 @@ def update_user_settings(user_id, theme, landing_page='dashboard'):
     
     conn.commit()
     conn.close()
+
+    invalidate_cache(user_id, 'users')
     
     return user_id
 
@@ -1110,4 +2271,8 @@ def reset_user_data(user_id):
     finally:
         conn.close()
 
+    # Deleted recipes may be public or saved by others
+    invalidate_cache(None, 'recipes')
+    invalidate_cache(user_id, 'saved_recipes', 'pantry', 'shopping_list', 'meal_plan', 'users')
+
     return "User data has been reset"
\ No newline at end of file
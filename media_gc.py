@@ -0,0 +1,270 @@
+"""
+Remove image files that no recipe refers to.
+
+    python media_gc.py                  # dry run: report what would be removed
+    python media_gc.py --quarantine     # move orphans to data/media_quarantine/
+    python media_gc.py --delete         # delete orphans
+
+Both --quarantine and --delete also delete quarantine folders older than
+GC_QUARANTINE_DAYS.
+
+Run it from the app directory (paths in recipes.image_path are relative to it).
+The app also runs it on a schedule, see start_scheduler().
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import threading
+from datetime import datetime
+
+import database as db
+import media_store
+
+# Where recipe images live: the media store plus the folders older versions
+# of Create/Edit Recipe wrote to
+MEDIA_DIRS = [media_store.MEDIA_DIR, os.path.join('data', 'uploads'), os.path.join('data', 'images')]
+QUARANTINE_DIR = os.path.join('data', 'media_quarantine')
+
+# Files newer than this are left alone: they may be mid-upload or about to be
+# saved on a recipe
+GC_GRACE_HOURS = float(os.environ.get('RECIPES_MEDIA_GC_GRACE_HOURS', '1'))
+GC_BATCH_SIZE = int(os.environ.get('RECIPES_MEDIA_GC_BATCH_SIZE', '500'))
+
+# Quarantined files are kept this many days (by the date folder they were moved to)
+GC_QUARANTINE_DAYS = float(os.environ.get('RECIPES_MEDIA_GC_QUARANTINE_DAYS', '30'))
+
+# Scheduled run inside the app: hours between runs (0 disables) and action
+GC_INTERVAL_HOURS = float(os.environ.get('RECIPES_MEDIA_GC_INTERVAL_HOURS', '24'))
+GC_SCHEDULED_MODE = os.environ.get('RECIPES_MEDIA_GC_MODE', 'quarantine')  # dry-run, quarantine or delete
+
+MODES = ('dry-run', 'quarantine', 'delete')
+
+_scheduler_started = False
+_scheduler_lock = threading.Lock()
+
+#helper functions
+def _owner_path(path):
+    """The image path a file belongs to (variants belong to their original)."""
+    if not media_store.is_stored(path):
+        return path
+
+    directory, name = os.path.split(path)
+    base, extension = os.path.splitext(name)
+    for variant in media_store.VARIANTS:
+        if base.endswith(f"-{variant}"):
+            return os.path.join(directory, base[:-len(variant) - 1] + extension)
+    return path
+
+def _scan_files(directory):
+    """Yield DirEntry objects for every file below directory, without listing it all at once."""
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from _scan_files(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+    except FileNotFoundError:
+        return
+
+def _referenced_paths(conn, paths=None):
+    """
+    Normalized image paths used by recipes, streamed from the database.
+    With paths, only those of the given paths that are referenced.
+    """
+    cursor = conn.cursor()
+
+    if paths is None:
+        cursor.execute("SELECT image_path FROM recipes WHERE image_path IS NOT NULL")
+    else:
+        placeholders = ', '.join('?' for _ in paths)
+        cursor.execute(f"SELECT image_path FROM recipes WHERE image_path IN ({placeholders})", list(paths))
+
+    referenced = set()
+    while True:
+        rows = cursor.fetchmany(1000)
+        if not rows:
+            break
+        referenced.update(os.path.normpath(row[0]) for row in rows)
+    return referenced
+
+def _remove(path, mode):
+    if mode == 'delete':
+        os.remove(path)
+    else:
+        target = os.path.join(QUARANTINE_DIR, datetime.now().strftime('%Y%m%d'), path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.move(path, target)
+
+def _process_batch(conn, batch, mode, report):
+    # Check the batch against the database again right before removing, in
+    # case a recipe started using one of the files since the scan began
+    owners = {_owner_path(path) for path, _ in batch}
+    still_referenced = _referenced_paths(conn, owners)
+
+    for path, size in batch:
+        if _owner_path(path) in still_referenced:
+            continue
+
+        report['orphaned'] += 1
+        report['orphaned_bytes'] += size
+        if len(report['sample']) < 20:
+            report['sample'].append(path)
+
+        if mode == 'dry-run':
+            continue
+        try:
+            _remove(path, mode)
+            report['removed'] += 1
+        except OSError as e:
+            report['errors'] += 1
+            print(f"Could not remove {path}: {e}")
+
+def purge_quarantine(max_age_days=None, report=None):
+    """Delete quarantine date folders older than max_age_days. Returns how many."""
+    max_age_days = GC_QUARANTINE_DAYS if max_age_days is None else max_age_days
+    cutoff = datetime.now().timestamp() - max_age_days * 86400
+
+    purged = 0
+    try:
+        folders = os.listdir(QUARANTINE_DIR)
+    except FileNotFoundError:
+        return purged
+
+    for name in folders:
+        try:
+            folder_date = datetime.strptime(name, '%Y%m%d')
+        except ValueError:
+            continue  # not one of ours
+        if folder_date.timestamp() >= cutoff:
+            continue
+        try:
+            shutil.rmtree(os.path.join(QUARANTINE_DIR, name))
+            purged += 1
+        except OSError as e:
+            if report is not None:
+                report['errors'] += 1
+            print(f"Could not remove {os.path.join(QUARANTINE_DIR, name)}: {e}")
+
+    return purged
+
+def collect_garbage(mode='dry-run', grace_hours=None, batch_size=None, quarantine_days=None):
+    """
+    Find image files not referenced by any recipe and, depending on mode,
+    only report them ('dry-run'), move them to QUARANTINE_DIR ('quarantine')
+    or delete them ('delete'). Except in dry runs, quarantine folders older
+    than quarantine_days are deleted too. Returns a report dict.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode: {mode}")
+
+    grace_hours = GC_GRACE_HOURS if grace_hours is None else grace_hours
+    batch_size = batch_size or GC_BATCH_SIZE
+    cutoff = time.time() - grace_hours * 3600
+
+    report = {
+        'mode': mode, 'scanned': 0, 'referenced': 0, 'too_new': 0,
+        'orphaned': 0, 'orphaned_bytes': 0, 'removed': 0, 'errors': 0,
+        'quarantine_purged': 0, 'sample': []
+    }
+
+    if mode != 'dry-run':
+        report['quarantine_purged'] = purge_quarantine(quarantine_days, report)
+
+    conn = db.get_db_connection()
+    try:
+        referenced = _referenced_paths(conn)
+
+        batch = []
+        for directory in MEDIA_DIRS:
+            for entry in _scan_files(directory):
+                report['scanned'] += 1
+                path = os.path.normpath(entry.path)
+                stat = entry.stat(follow_symlinks=False)
+
+                if _owner_path(path) in referenced:
+                    report['referenced'] += 1
+                elif stat.st_mtime > cutoff:
+                    report['too_new'] += 1
+                else:
+                    batch.append((path, stat.st_size))
+
+                if len(batch) >= batch_size:
+                    _process_batch(conn, batch, mode, report)
+                    batch = []
+
+        if batch:
+            _process_batch(conn, batch, mode, report)
+    finally:
+        conn.close()
+
+    return report
+
+def format_report(report):
+    lines = [
+        f"Mode: {report['mode']}",
+        f"Files scanned: {report['scanned']}",
+        f"Referenced by recipes: {report['referenced']}",
+        f"Skipped (newer than grace period): {report['too_new']}",
+        f"Unreferenced: {report['orphaned']} ({report['orphaned_bytes'] / (1024 * 1024):.1f} MB)",
+    ]
+    if report['mode'] != 'dry-run':
+        lines.append(f"Removed: {report['removed']} (errors: {report['errors']})")
+        lines.append(f"Old quarantine folders deleted: {report['quarantine_purged']}")
+    if report['sample']:
+        lines.append("Examples:")
+        lines.extend(f"  {path}" for path in report['sample'])
+    return '\n'.join(lines)
+
+def _run_scheduled():
+    while True:
+        time.sleep(GC_INTERVAL_HOURS * 3600)
+        try:
+            report = collect_garbage(mode=GC_SCHEDULED_MODE)
+            print(f"Media cleanup:\n{format_report(report)}")
+        except Exception as e:
+            print(f"Media cleanup failed: {e}")
+
+def start_scheduler():
+    """Run collect_garbage every GC_INTERVAL_HOURS in a background thread (once per process)."""
+    global _scheduler_started
+
+    if GC_INTERVAL_HOURS <= 0:
+        return
+
+    # Fail on startup rather than inside the thread a day later
+    if GC_SCHEDULED_MODE not in MODES:
+        raise ValueError(f"RECIPES_MEDIA_GC_MODE must be one of {', '.join(MODES)}, not {GC_SCHEDULED_MODE!r}")
+
+    with _scheduler_lock:
+        if _scheduler_started:
+            return
+        _scheduler_started = True
+
+    threading.Thread(target=_run_scheduled, name='media-gc', daemon=True).start()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Remove recipe images that no recipe refers to.")
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument('--quarantine', action='store_true', help=f"move unreferenced files to {QUARANTINE_DIR}")
+    action.add_argument('--delete', action='store_true', help="delete unreferenced files")
+    parser.add_argument('--grace-hours', type=float, default=GC_GRACE_HOURS,
+                        help="leave files newer than this alone (default: %(default)s)")
+    parser.add_argument('--batch-size', type=int, default=GC_BATCH_SIZE,
+                        help="files re-checked and removed per batch (default: %(default)s)")
+    parser.add_argument('--quarantine-days', type=float, default=GC_QUARANTINE_DAYS,
+                        help="delete quarantine folders older than this (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    mode = 'delete' if args.delete else 'quarantine' if args.quarantine else 'dry-run'
+
+    db.init_DB()
+    report = collect_garbage(mode=mode, grace_hours=args.grace_hours, batch_size=args.batch_size,
+                             quarantine_days=args.quarantine_days)
+    print(format_report(report))
+    return 0 if report['errors'] == 0 else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,273 @@
+import os
+import io
+import base64
+import atexit
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Recipe images are stored under Streamlit's static folder, named by the
+# SHA-256 of their content, so the browser can cache them forever and the same
+# photo uploaded twice is stored once. Requires server.enableStaticServing.
+STATIC_DIR = "static"
+MEDIA_DIR = os.path.join(STATIC_DIR, "media")
+STATIC_URL = "app/static"
+
+# Uploads are re-encoded on the way in: capped to IMAGE_MAX_SIDE pixels on
+# the longest side, saved as IMAGE_FORMAT (WEBP or JPEG) at IMAGE_QUALITY,
+# with EXIF and other metadata dropped
+IMAGE_MAX_SIDE = int(os.environ.get('RECIPES_IMAGE_MAX_SIDE', '2048'))
+IMAGE_FORMAT = os.environ.get('RECIPES_IMAGE_FORMAT', 'WEBP').upper()
+IMAGE_QUALITY = int(os.environ.get('RECIPES_IMAGE_QUALITY', '80'))
+IMAGE_WORKERS = int(os.environ.get('RECIPES_IMAGE_WORKERS', '1'))
+
+# Downscaled copies made at upload time: name -> longest side in pixels
+VARIANTS = {
+    'display': 1200,
+    'thumb': 400,
+}
+
+_FORMAT_EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+
+# Checked here so a bad setting fails on startup, not on every upload
+if IMAGE_FORMAT == 'JPG':
+    IMAGE_FORMAT = 'JPEG'
+if IMAGE_FORMAT not in ('WEBP', 'JPEG'):
+    raise ValueError(f"RECIPES_IMAGE_FORMAT must be WEBP or JPEG, not {IMAGE_FORMAT!r}")
+_MIME_TYPES = {'jpg': 'image/jpeg', 'jpeg': 'image/jpeg', 'png': 'image/png', 'webp': 'image/webp'}
+
+# Inline (base64) images for older uploads: (path, mtime, size) -> data URI
+IMAGE_CACHE_BYTES = int(float(os.environ.get('RECIPES_IMAGE_CACHE_MB', '64')) * 1024 * 1024)
+_image_cache = OrderedDict()
+_image_cache_bytes = 0
+_image_cache_lock = threading.Lock()
+_image_cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+# Uploads are processed by a background worker; path -> Future while pending,
+# path -> error dict if writing the files failed
+_executor = None
+_pending = {}
+_failed = {}
+_pending_lock = threading.Lock()
+
+#helper functions
+def _media_path(digest, suffix):
+    # Two-character fan-out keeps directories small
+    return os.path.join(MEDIA_DIR, digest[:2], f"{digest}{suffix}")
+
+def _variant_path(image_path, variant):
+    base, extension = os.path.splitext(image_path)
+    return f"{base}-{variant}{extension}"
+
+def _prepare(image):
+    # Apply the EXIF rotation before the metadata is dropped
+    image = ImageOps.exif_transpose(image)
+
+    if IMAGE_FORMAT == 'JPEG':
+        if image.mode in ('RGBA', 'LA', 'P'):
+            # JPEG has no transparency: flatten onto white
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            return background
+        return image.convert('RGB')
+
+    return image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+
+def _write_image(image, path, max_side):
+    """Downscale and encode to a temp file next to path, then rename it into place."""
+    image = image.copy()
+    image.thumbnail((max_side, max_side))
+
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            # No exif= argument: metadata is not carried over
+            image.save(f, IMAGE_FORMAT, quality=IMAGE_QUALITY, optimize=True)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+def _decode(data):
+    """Fully decode uploaded bytes, or return an error dict."""
+    try:
+        image = Image.open(io.BytesIO(data))
+        if image.format not in _FORMAT_EXTENSIONS:
+            return {"error": "Images must be PNG, JPEG or WebP"}
+        # For JPEGs, let the decoder downscale while reading (much faster for camera photos)
+        image.draft('RGB', (IMAGE_MAX_SIDE, IMAGE_MAX_SIDE))
+        # Reads the whole file, so truncated or corrupt uploads fail here
+        image.load()
+    except (UnidentifiedImageError, OSError, SyntaxError, Image.DecompressionBombError):
+        return {"error": "The uploaded file is not a valid image"}
+    return image
+
+def _ingest(image, image_path):
+    try:
+        image = _prepare(image)
+
+        os.makedirs(os.path.dirname(image_path), exist_ok=True)
+
+        # Variants first, so a stored image always has them
+        for variant, max_side in VARIANTS.items():
+            _write_image(image, _variant_path(image_path, variant), max_side)
+        _write_image(image, image_path, IMAGE_MAX_SIDE)
+    except Exception as e:
+        with _pending_lock:
+            _failed[image_path] = {"error": f"Could not store the image: {e}"}
+    finally:
+        with _pending_lock:
+            _pending.pop(image_path, None)
+
+def _touch(image_path):
+    # Reused files count as new again, so media_gc's grace period protects
+    # them until the recipe referring to them is saved
+    for path in [image_path] + [_variant_path(image_path, v) for v in VARIANTS]:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+def _get_executor():
+    global _executor
+
+    with _pending_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix='media-ingest')
+        return _executor
+
+def is_stored(image_path):
+    """True if the path points into the media store (not a legacy upload)."""
+    if not image_path:
+        return False
+    media_root = os.path.normpath(MEDIA_DIR) + os.sep
+    return os.path.normpath(image_path).startswith(media_root)
+
+def save_upload(data):
+    """
+    Validate uploaded image bytes, queue them for processing and return the
+    image path to save on the recipe (the file appears there once the
+    background worker is done). Returns an error dict if the data is not a
+    supported, readable image.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    image_path = _media_path(digest, f".{_FORMAT_EXTENSIONS[IMAGE_FORMAT]}")
+
+    with _pending_lock:
+        # Same content already stored or being processed: nothing to do
+        if image_path in _pending:
+            return image_path
+        if os.path.exists(image_path):
+            _touch(image_path)
+            return image_path
+
+    # Decoded here rather than in the worker, so a broken upload is reported
+    # to the user instead of leaving the recipe pointing at a missing file
+    image = _decode(data)
+    if isinstance(image, dict):
+        return image
+
+    executor = _get_executor()
+    with _pending_lock:
+        if image_path in _pending:
+            return image_path
+        _failed.pop(image_path, None)
+        # Submitted under the lock so the worker cannot finish (and clear
+        # its entry) before the entry exists
+        _pending[image_path] = executor.submit(_ingest, image, image_path)
+
+    return image_path
+
+def is_processing(image_path):
+    """True while an uploaded image is still being written."""
+    with _pending_lock:
+        return image_path in _pending
+
+def upload_error(image_path):
+    """Error dict if writing an uploaded image failed, else None."""
+    with _pending_lock:
+        return _failed.get(image_path)
+
+def wait_for_uploads(timeout=None):
+    """Block until queued uploads are written (used on shutdown and by scripts)."""
+    with _pending_lock:
+        futures = list(_pending.values())
+    wait(futures, timeout=timeout)
+
+def image_url(image_path, variant='display'):
+    """Static URL of a stored image (variant if it exists), or None."""
+    if not is_stored(image_path):
+        return None
+
+    path = image_path
+    if variant is not None and os.path.exists(_variant_path(image_path, variant)):
+        path = _variant_path(image_path, variant)
+
+    relative = os.path.relpath(path, STATIC_DIR).replace(os.sep, '/')
+    return f"{STATIC_URL}/{relative}"
+
+def inline_image_uri(image_path):
+    """
+    data: URI for an image outside the media store (older uploads). Encoded
+    URIs are kept in a process-wide LRU cache limited to IMAGE_CACHE_BYTES,
+    keyed by path and modification time so a changed file is re-read.
+    """
+    global _image_cache_bytes
+
+    stat = os.stat(image_path)
+    key = (image_path, stat.st_mtime_ns, stat.st_size)
+
+    with _image_cache_lock:
+        uri = _image_cache.get(key)
+        if uri is not None:
+            _image_cache.move_to_end(key)
+            _image_cache_stats['hits'] += 1
+            return uri
+        _image_cache_stats['misses'] += 1
+
+    extension = os.path.splitext(image_path)[1].lstrip('.').lower()
+    with open(image_path, 'rb') as f:
+        encoded = base64.b64encode(f.read()).decode()
+    uri = f"data:{_MIME_TYPES.get(extension, 'image/jpeg')};base64,{encoded}"
+
+    # One bigger than the whole budget would only evict everything else
+    if len(uri) <= IMAGE_CACHE_BYTES:
+        with _image_cache_lock:
+            if key not in _image_cache:
+                _image_cache[key] = uri
+                _image_cache_bytes += len(uri)
+            while _image_cache_bytes > IMAGE_CACHE_BYTES:
+                _, evicted = _image_cache.popitem(last=False)
+                _image_cache_bytes -= len(evicted)
+                _image_cache_stats['evictions'] += 1
+
+    return uri
+
+def get_image_cache_stats():
+    with _image_cache_lock:
+        return {
+            **_image_cache_stats,
+            'entries': len(_image_cache),
+            'bytes': _image_cache_bytes,
+            'max_bytes': IMAGE_CACHE_BYTES
+        }
+
+def image_src(image_path, variant='display'):
+    """
+    Value for an <img src>: the static URL for stored images, an inline data
+    URI for older uploads, or None if there is no image file.
+    """
+    if not image_path or not os.path.exists(image_path):
+        return None
+
+    return image_url(image_path, variant) or inline_image_uri(image_path)
+
+atexit.register(wait_for_uploads)
@@ -1,8 +1,9 @@
 import streamlit as st
 import database as db
-import json
 import theme_manager
+import auth_session
 
+auth_session.restore_session()
 theme_manager.apply_user_theme()
 
 # Page config
@@ -66,6 +67,9 @@ st.markdown("---")
 # Main content in columns
 col_left, col_right = st.columns([2, 1])
 
+# Pantry and shopping list previews with their totals
+summary = db.get_dashboard_summary(st.session_state.user_id, limit=5)
+
 with col_left:
     # Recipe of the Day
     st.subheader("🌟 Recipe of the Day")
@@ -76,27 +80,17 @@ with col_left:
         with st.container():
             st.markdown(f"### {recipe_of_day['title']}")
             
-        try:
-            ingredients_list = json.loads(recipe_of_day['ingredients'])
-            # Display first 5 ingredients
-            st.markdown("**Ingredients:**")
-            for ingredient in ingredients_list[:5]:  # Show first 5 ingredients
-                qty = ingredient.get('quantity', '')
-                unit = ingredient.get('unit', '')
-                name = ingredient.get('name', '')
-                st.markdown(f"- {qty} {unit} {name}".strip())
-            
-            if len(ingredients_list) > 5:
-                st.caption(f"... and {len(ingredients_list) - 5} more ingredients")
-        except (json.JSONDecodeError, TypeError):
-            # Fallback if it's plain text
-            ingredients_list = recipe_of_day['ingredients'].split('\n')
-            st.markdown("**Ingredients:**")
-            for ingredient in ingredients_list[:5]:
-                if ingredient.strip():
-                    st.markdown(f"- {ingredient.strip()}")
-            if len(ingredients_list) > 5:
-                st.caption(f"... and {len(ingredients_list) - 5} more ingredients")
+        ingredients_list = db.get_recipe_ingredients(recipe_of_day['recipe_id'])
+        # Display first 5 ingredients
+        st.markdown("**Ingredients:**")
+        for ingredient in ingredients_list[:5]:  # Show first 5 ingredients
+            qty = f"{ingredient['quantity']:.2f}".rstrip("0").rstrip(".") if ingredient['quantity'] else ''
+            unit = ingredient['unit'] or ''
+            name = ingredient['name']
+            st.markdown(f"- {qty} {unit} {name}".strip())
+        
+        if len(ingredients_list) > 5:
+            st.caption(f"... and {len(ingredients_list) - 5} more ingredients")
         
         # Button to view full recipe
         if st.button("👁️ View Full Recipe", key="view_recipe_of_day"):
@@ -110,17 +104,17 @@ with col_right:
     # Pantry Preview
     st.subheader("🥫 Pantry Preview")
     
-    pantry_items = db.get_user_pantry(st.session_state.user_id)
+    pantry_items = summary['pantry_items']
     
     if pantry_items:
         # Show first 5 items
-        for item in pantry_items[:5]:
+        for item in pantry_items:
             qty = item['quantity']
             formatted_qty = f"{qty:.2f}".rstrip("0").rstrip(".") if "." in str(qty) else str(qty)
             st.markdown(f"- **{item['name']}**: {formatted_qty} {item['unit'] or ''}")
         
-        if len(pantry_items) > 5:
-            st.caption(f"... and {len(pantry_items) - 5} more items")
+        if summary['pantry_total'] > len(pantry_items):
+            st.caption(f"... and {summary['pantry_total'] - len(pantry_items)} more items")
         
         if st.button("View Full Pantry", use_container_width=True):
             st.switch_page("pages/3_Pantry.py")
@@ -134,18 +128,16 @@ with col_right:
     # Shopping List Preview
     st.subheader("🛒 Shopping List Preview")
     
-    shopping_items = db.get_user_shopping_list(st.session_state.user_id)
-    
-    if shopping_items:
+    if summary['shopping_total']:
         # Show first 5 unchecked items
-        unchecked_items = [item for item in shopping_items if not item['is_checked']]
+        unchecked_items = summary['shopping_items']
         
-        for item in unchecked_items[:5]:
+        for item in unchecked_items:
             quantity_str = f"{item['quantity']} {item['unit'] or ''}" if item['quantity'] else ""
             st.markdown(f"- {item['name']} {quantity_str}")
         
-        if len(unchecked_items) > 5:
-            st.caption(f"... and {len(unchecked_items) - 5} more items")
+        if summary['shopping_unchecked_total'] > len(unchecked_items):
+            st.caption(f"... and {summary['shopping_unchecked_total'] - len(unchecked_items)} more items")
         
         if st.button("View Full Shopping List", use_container_width=True):
             st.switch_page("pages/4_Shopping_List.py")
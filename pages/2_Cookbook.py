@@ -1,31 +1,14 @@
 import streamlit as st
 import database as db
+import html
 import theme_manager
-import json
+import auth_session
 
+auth_session.restore_session()
 theme_manager.apply_user_theme()
 
-# Helper function to parse ingredients
-def parse_ingredients_preview(ingredients_data):
-    """Parse ingredients and return a preview string"""
-    try:
-        # Try to parse as JSON
-        ingredients_list = json.loads(ingredients_data)
-        if isinstance(ingredients_list, list):
-            # Extract ingredient names
-            ingredient_names = [ing.get('name', '') for ing in ingredients_list[:3] if ing.get('name')]
-            preview = ', '.join(ingredient_names)
-            if len(ingredients_list) > 3:
-                preview += " ..."
-            return preview
-    except (json.JSONDecodeError, TypeError):
-        # Fallback: treat as newline-separated text
-        ingredients_list = ingredients_data.split('\n')
-        ingredients_preview = ', '.join([ing.strip() for ing in ingredients_list[:3] if ing.strip()])
-        if len(ingredients_list) > 3:
-            ingredients_preview += " ..."
-        return ingredients_preview
-    return ""
+# Number of public recipes fetched per "Load more"
+PUBLIC_RECIPES_PER_PAGE = 12
 
 # Page config
 st.set_page_config(
@@ -63,7 +46,7 @@ with tab1:
     
     st.markdown("---")
     
-    user_recipes = db.get_user_cookbook(st.session_state.user_id)
+    user_recipes = db.get_user_cookbook_summaries(st.session_state.user_id)
     
     if user_recipes:
         # Use columns for grid layout
@@ -75,7 +58,7 @@ with tab1:
                     recipe = user_recipes[i + j]
                     with col:
                         # Recipe card container
-                        ingredients_preview = parse_ingredients_preview(recipe['ingredients'])
+                        ingredients_preview = html.escape(recipe['ingredients_preview'])
                         created_date = recipe['created_at'][:10] if recipe['created_at'] else "Unknown"
                         
                         status_class = "status-public" if recipe['is_public'] else "status-private"
@@ -83,7 +66,7 @@ with tab1:
                         
                         card_html = f"""
                         <div class="recipe-card">
-                            <div class="recipe-title">{recipe['title']}</div>
+                            <div class="recipe-title">{html.escape(recipe['title'])}</div>
                             <span class="status-tag {status_class}">{status_text}</span>
                             <p class="recipe-ingredients"><em>Ingredients:</em> {ingredients_preview}</p>
                             <div class="recipe-date">Created: {created_date}</div>
@@ -134,7 +117,7 @@ with tab2:
     st.subheader("Saved Public Recipes")
     st.markdown("---")
     
-    saved_recipes = db.get_saved_public_recipes(st.session_state.user_id)
+    saved_recipes = db.get_saved_recipe_summaries(st.session_state.user_id)
     
     if saved_recipes:
         # Use columns for grid layout
@@ -145,12 +128,12 @@ with tab2:
                 if i + j < len(saved_recipes):
                     recipe = saved_recipes[i + j]
                     with col:
-                        ingredients_preview = parse_ingredients_preview(recipe['ingredients'])
+                        ingredients_preview = html.escape(recipe['ingredients_preview'])
                         saved_date = recipe['created_at'][:10] if recipe['created_at'] else "Recently"
                         
                         card_html = f"""
                         <div class="recipe-card">
-                            <div class="recipe-title">{recipe['title']}</div>
+                            <div class="recipe-title">{html.escape(recipe['title'])}</div>
                             <p class="recipe-ingredients"><em>Ingredients:</em> {ingredients_preview}</p>
                             <div class="recipe-date">Saved: {saved_date}</div>
                         </div>
@@ -175,15 +158,36 @@ with tab3:
     st.subheader("Browse Public Recipes")
     st.markdown("---")
     
-    public_recipes = db.get_all_public_recipes()
+    search_term = st.text_input("🔍 Search recipes", key="public_search")
     
-    if public_recipes:
-        search_term = st.text_input("🔍 Search recipes", key="public_search")
-        
-        filtered_recipes = public_recipes
-        if search_term:
-            filtered_recipes = [r for r in public_recipes if search_term.lower() in r['title'].lower()]
-        
+    # Start the feed over whenever the search changes
+    if st.session_state.get('public_feed_search') != search_term or 'public_feed_pages' not in st.session_state:
+        st.session_state.public_feed_search = search_term
+        st.session_state.public_feed_pages = 1
+        st.session_state.public_feed_version = None
+    
+    if search_term:
+        # Ranked full-text search over titles, ingredients and instructions
+        filtered_recipes, has_more = db.search_public_recipes(
+            search_term,
+            limit=PUBLIC_RECIPES_PER_PAGE * st.session_state.public_feed_pages
+        )
+    else:
+        # The feed keeps the recipes loaded so far and the cursor after the last
+        # one: reruns don't query, and Load More fetches only the next page.
+        # If recipes changed since, the pages shown so far are reloaded at once.
+        feed_version = db.get_data_version('recipes', 'users')
+        if st.session_state.public_feed_version != feed_version:
+            recipes, next_cursor = db.get_public_recipes_page(
+                limit=PUBLIC_RECIPES_PER_PAGE * st.session_state.public_feed_pages
+            )
+            st.session_state.public_feed_recipes = recipes
+            st.session_state.public_feed_cursor = next_cursor
+            st.session_state.public_feed_version = feed_version
+        filtered_recipes = st.session_state.public_feed_recipes
+        has_more = st.session_state.public_feed_cursor is not None
+    
+    if filtered_recipes or search_term:
         if filtered_recipes:
             # Use columns for grid layout
             cols_per_row = 3
@@ -193,13 +197,19 @@ with tab3:
                     if i + j < len(filtered_recipes):
                         recipe = filtered_recipes[i + j]
                         with col:
-                            ingredients_preview = parse_ingredients_preview(recipe['ingredients'])
+                            ingredients_preview = html.escape(recipe['ingredients_preview'])
                             created_date = recipe['created_at'][:10] if recipe['created_at'] else "Recently"
                             
+                            # Show where the search matched, if it did
+                            snippet_html = ""
+                            if recipe.get('snippet'):
+                                snippet_html = f'<p class="recipe-ingredients"><em>Match:</em> {recipe["snippet"]}</p>'
+                            
                             card_html = f"""
                             <div class="recipe-card">
-                                <div class="recipe-title">{recipe['title']}</div>
+                                <div class="recipe-title">{html.escape(recipe['title'])}</div>
                                 <p class="recipe-ingredients"><em>Ingredients:</em> {ingredients_preview}</p>
+                                {snippet_html}
                                 <div class="recipe-date">Created: {created_date}</div>
                             </div>
                             """
@@ -218,6 +228,21 @@ with tab3:
                                         st.rerun()
                                     else:
                                         st.error("Already saved!")
+            
+            # Load the next page after the last recipe shown
+            if has_more:
+                col_more = st.columns([2, 1, 2])[1]
+                with col_more:
+                    if st.button("⬇️ Load More", use_container_width=True, key="load_more_public"):
+                        if not search_term:
+                            recipes, next_cursor = db.get_public_recipes_page(
+                                limit=PUBLIC_RECIPES_PER_PAGE,
+                                cursor=st.session_state.public_feed_cursor
+                            )
+                            st.session_state.public_feed_recipes = filtered_recipes + recipes
+                            st.session_state.public_feed_cursor = next_cursor
+                        st.session_state.public_feed_pages += 1
+                        st.rerun()
         else:
             st.warning(f"😕 No recipes found for '{search_term}'.")
     else:
@@ -1,8 +1,11 @@
 import streamlit as st
 import database as db
+import html
 from datetime import datetime, timedelta
 import theme_manager
+import auth_session
 
+auth_session.restore_session()
 theme_manager.apply_user_theme()
 
 # Page config
@@ -82,9 +85,18 @@ with c3:
 # Fetch & process items
 items = db.get_user_pantry(st.session_state.user_id)
 today = datetime.now().date()
-processed = []
+# Derived display fields per pantry_id (the rows themselves are not copied)
+details = {}
 
-for item in items:
+# Convert all quantities to the other unit system in one pass
+target_system = "metric" if user_unit_system == "imperial" else "imperial"
+converted_quantities, converted_units = db.convert_units_batch(
+    [item["quantity"] for item in items],
+    [item["unit"] or "" for item in items],
+    to_system=target_system
+)
+
+for item, converted_qty, converted_unit in zip(items, converted_quantities, converted_units):
     exp_date = datetime.strptime(item["expiration_date"], "%Y-%m-%d").date()
     days_left = (exp_date - today).days
     qty = item["quantity"]
@@ -109,7 +121,7 @@ for item in items:
             badges.append(f'<span class="status-badge status-expiring">Expires in {days_left} days</span>')
     if is_low:
         qty_display = f"{qty:.2f}".rstrip("0").rstrip(".") if "." in str(qty) else str(qty)
-        badges.append(f'<span class="status-badge status-low">Low Stock ({qty_display} {unit})</span>')
+        badges.append(f'<span class="status-badge status-low">Low Stock ({qty_display} {html.escape(unit)})</span>')
     if not badges:
         badges.append('<span class="status-badge status-good">Good</span>')
 
@@ -127,11 +139,9 @@ for item in items:
     formatted_qty = f"{qty:.2f}".rstrip("0").rstrip(".") if "." in str(qty) else str(qty)
     
     # Check if unit is convertible
-    converted_qty, converted_unit = db.convert_unit(qty, unit, to_system="metric" if user_unit_system == "imperial" else "imperial")
-    is_convertible = (converted_unit != unit) and (unit is not None and unit != "")
+    is_convertible = db.is_convertible(unit, target_system)
     
-    processed.append({
-        **item,
+    details[item["pantry_id"]] = {
         "days_left": days_left,
         "badges_html": " ".join(badges),
         "primary_status": primary_status,
@@ -139,24 +149,24 @@ for item in items:
         "is_convertible": is_convertible,
         "converted_qty": converted_qty,
         "converted_unit": converted_unit
-    })
+    }
 
 # Apply search
-filtered = [i for i in processed if search.lower() in i["name"].lower()]
+filtered = [i for i in items if search.lower() in i["name"].lower()]
 
 # Apply filter
 if filter_by == "Expired":
-    filtered = [i for i in filtered if i["primary_status"] == "expired"]
+    filtered = [i for i in filtered if details[i["pantry_id"]]["primary_status"] == "expired"]
 elif filter_by == "Expiring Soon":
-    filtered = [i for i in filtered if i["primary_status"] == "expiring"]
+    filtered = [i for i in filtered if details[i["pantry_id"]]["primary_status"] == "expiring"]
 elif filter_by == "Low Stock":
-    filtered = [i for i in filtered if i["primary_status"] == "low"]
+    filtered = [i for i in filtered if details[i["pantry_id"]]["primary_status"] == "low"]
 elif filter_by == "Good":
-    filtered = [i for i in filtered if i["primary_status"] == "good"]
+    filtered = [i for i in filtered if details[i["pantry_id"]]["primary_status"] == "good"]
 
 # Sort
 if sort_by == "Expiration Date":
-    filtered.sort(key=lambda x: x["days_left"])
+    filtered.sort(key=lambda x: details[x["pantry_id"]]["days_left"])
 elif sort_by == "Name":
     filtered.sort(key=lambda x: x["name"].lower())
 elif sort_by == "Quantity":
@@ -167,9 +177,9 @@ st.markdown("---")
 # Summary
 c1, c2, c3, c4 = st.columns(4)
 with c1: st.metric("Total", len(items))
-with c2: st.metric("Expired", len([i for i in processed if i["primary_status"] == "expired"]))
-with c3: st.metric("Expiring Soon", len([i for i in processed if i["primary_status"] == "expiring"]))
-with c4: st.metric("Low Stock", len([i for i in processed if i["primary_status"] == "low"]))
+with c2: st.metric("Expired", len([i for i in items if details[i["pantry_id"]]["primary_status"] == "expired"]))
+with c3: st.metric("Expiring Soon", len([i for i in items if details[i["pantry_id"]]["primary_status"] == "expiring"]))
+with c4: st.metric("Low Stock", len([i for i in items if details[i["pantry_id"]]["primary_status"] == "low"]))
 
 st.markdown("---")
 
@@ -184,29 +194,30 @@ if filtered:
         for j in range(2):
             if i + j < len(filtered):
                 item = filtered[i + j]
+                info = details[item['pantry_id']]
                 with cols[j]:
                     # Determine which quantity to show based on toggle state
                     toggle_key = f"toggle_{item['pantry_id']}"
                     show_converted = st.session_state.conversion_toggles.get(toggle_key, False)
                     
-                    if show_converted and item['is_convertible']:
-                        display_qty = f"{item['converted_qty']:.2f}".rstrip("0").rstrip(".")
-                        display_unit = item['converted_unit']
+                    if show_converted and info['is_convertible']:
+                        display_qty = f"{info['converted_qty']:.2f}".rstrip("0").rstrip(".")
+                        display_unit = info['converted_unit']
                         quantity_text = f"{display_qty} {display_unit}"
                     else:
-                        quantity_text = item['qty_text']
+                        quantity_text = info['qty_text']
                     
                     st.markdown(f"""
                     <div class="pantry-card">
-                        <div class="item-name">{item['name']}</div>
-                        <div class="item-quantity">Quantity: {quantity_text}</div>
+                        <div class="item-name">{html.escape(item['name'])}</div>
+                        <div class="item-quantity">Quantity: {html.escape(quantity_text)}</div>
                         <div class="item-date">Expires: {item['expiration_date']}</div>
-                        <div>{item['badges_html']}</div>
+                        <div>{info['badges_html']}</div>
                     </div>
                     """, unsafe_allow_html=True)
                     
                     # Action buttons row
-                    if item['is_convertible']:
+                    if info['is_convertible']:
                         spacer, b1, b2, b3 = st.columns([0.25, 1, 1, 1]) # extra spacer for conversion button
                         with b1:
                             if st.button("Edit", key=f"edit_{item['pantry_id']}"):
@@ -1,7 +1,10 @@
 import streamlit as st
 import database as db
+import html
 import theme_manager
+import auth_session
 
+auth_session.restore_session()
 theme_manager.apply_user_theme()
 
 # Page config
@@ -82,31 +85,28 @@ st.markdown("---")
 # Fetch shopping list items
 shopping_items = db.get_user_shopping_list(st.session_state.user_id)
 
-# Process items to add conversion info
-processed_items = []
-for item in shopping_items:
+# Conversion info per list_id (the rows themselves are not copied),
+# converted for the whole list in one pass
+target_system = "metric" if user_unit_system == "imperial" else "imperial"
+converted_quantities, converted_units = db.convert_units_batch(
+    [item['quantity'] for item in shopping_items],
+    [item['unit'] for item in shopping_items],
+    to_system=target_system
+)
+
+conversions = {}
+for item, converted_qty, converted_unit in zip(shopping_items, converted_quantities, converted_units):
     # Check if unit is convertible
-    if item['quantity'] and item['unit']:
-        converted_qty, converted_unit = db.convert_unit(
-            item['quantity'], 
-            item['unit'], 
-            to_system="metric" if user_unit_system == "imperial" else "imperial"
-        )
-        is_convertible = (converted_unit != item['unit'])
-    else:
-        converted_qty = item['quantity']
-        converted_unit = item['unit']
-        is_convertible = False
+    is_convertible = bool(item['quantity']) and db.is_convertible(item['unit'], target_system)
     
-    processed_items.append({
-        **item,
+    conversions[item['list_id']] = {
         'is_convertible': is_convertible,
         'converted_qty': converted_qty,
         'converted_unit': converted_unit
-    })
+    }
 
 # Apply filters
-filtered_items = processed_items
+filtered_items = list(shopping_items)
 
 # Search filter
 if search_query:
@@ -149,6 +149,7 @@ if filtered_items:
     filtered_items.sort(key=lambda x: (x['is_checked'], x['name'].lower()))
     
     for item in filtered_items:
+        conversion = conversions[item['list_id']]
         checked_class = "checked" if item['is_checked'] else ""
         
         # Determine which quantity to show based on toggle state
@@ -158,10 +159,10 @@ if filtered_items:
         # Build quantity display
         quantity_display = ""
         if item['quantity']:
-            if show_converted and item['is_convertible']:
-                qty = item['converted_qty']
+            if show_converted and conversion['is_convertible']:
+                qty = conversion['converted_qty']
                 formatted_qty = f"{qty:.2f}".rstrip("0").rstrip(".") if "." in str(qty) else str(qty)
-                unit = item['converted_unit'] or ""
+                unit = conversion['converted_unit'] or ""
             else:
                 qty = item['quantity']
                 formatted_qty = f"{qty:.2f}".rstrip("0").rstrip(".") if "." in str(qty) else str(qty)
@@ -171,13 +172,13 @@ if filtered_items:
         # Display card
         st.markdown(f"""
         <div class="shopping-card {checked_class}">
-            <div class="item-name">{item['name']}</div>
-            <div class="item-quantity">{quantity_display}</div>
+            <div class="item-name">{html.escape(item['name'])}</div>
+            <div class="item-quantity">{html.escape(quantity_display)}</div>
         </div>
         """, unsafe_allow_html=True)
         
         # Action buttons
-        if item['is_convertible']:
+        if conversion['is_convertible']:
             col1, col2, col3, col4, col5 = st.columns([1, 1, 1, 1, 1])
             with col1:
                 checkbox_label = "✅ Uncheck" if item['is_checked'] else "☑️ Check"
@@ -1,10 +1,23 @@
 import streamlit as st
 import database as db
 from datetime import datetime, timedelta
+import math
 import theme_manager
+import auth_session
 
+auth_session.restore_session()
 theme_manager.apply_user_theme()
 
+# Number of planned meals per page in the list view
+MEALS_PER_PAGE = 20
+
+# Helper function to group meal plan entries by date
+def group_meals_by_date(entries):
+    meals_by_date = {}
+    for plan in entries:
+        meals_by_date.setdefault(plan['date'], []).append(plan)
+    return meals_by_date
+
 # Page config
 st.set_page_config(
     page_title="Meal Plan - Recipes For Success",
@@ -27,9 +40,11 @@ with col2:
 
 st.markdown("---")
 
-# Initialize session state for week navigation
+# Initialize session state for week navigation and list paging
 if 'current_week_offset' not in st.session_state:
     st.session_state.current_week_offset = 0
+if 'meal_list_page' not in st.session_state:
+    st.session_state.meal_list_page = None  # None = the page with today's meals
 
 # View toggle
 view_mode = st.radio("View Mode", ["📅 Calendar View", "📋 List View"], horizontal=True, label_visibility="collapsed")
@@ -40,10 +55,8 @@ st.markdown("---")
 with st.expander("➕ Add Meal to Plan", expanded=False):
     st.markdown('<div class="form-container">', unsafe_allow_html=True)
     
-    # Get user's recipes for dropdown
-    user_recipes = db.get_user_cookbook(st.session_state.user_id)
-    saved_recipes = db.get_saved_public_recipes(st.session_state.user_id)
-    all_available_recipes = user_recipes + saved_recipes
+    # Get user's own and saved recipes (id and title only) for dropdown
+    all_available_recipes = db.get_recipe_options(st.session_state.user_id)
     
     if not all_available_recipes:
         st.info("📚 You don't have any recipes yet. Create or save recipes to add them to your meal plan!")
@@ -84,26 +97,6 @@ with st.expander("➕ Add Meal to Plan", expanded=False):
 
 st.markdown("---")
 
-# Fetch meal plan
-meal_plans = db.get_user_meal_plan(st.session_state.user_id)
-
-# Create a dictionary to organize meals by date
-meals_by_date = {}
-for plan in meal_plans:
-    date = plan['date']
-    if date not in meals_by_date:
-        meals_by_date[date] = []
-    
-    # Get recipe details
-    recipe = db.get_recipe(plan['recipe_id'])
-    if recipe:
-        meals_by_date[date].append({
-            'plan_id': plan['plan_id'],
-            'meal_type': plan['meal_type'],
-            'recipe_title': recipe['title'],
-            'recipe_id': recipe['recipe_id']
-        })
-
 # === CALENDAR VIEW ===
 if view_mode == "📅 Calendar View":
     # Custom CSS for card styling
@@ -222,6 +215,13 @@ if view_mode == "📅 Calendar View":
     
     st.markdown("---")
     
+    # Fetch only the displayed week (entries come back joined with their recipe title)
+    meals_by_date = group_meals_by_date(db.get_meal_plan_entries(
+        st.session_state.user_id,
+        start_date=week_start.strftime('%Y-%m-%d'),
+        end_date=week_end.strftime('%Y-%m-%d')
+    ))
+    
     # Create 7-day calendar grid
     days_of_week = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
     
@@ -289,6 +289,23 @@ if view_mode == "📅 Calendar View":
 else:
     st.subheader("📋 Meal Plan List")
     
+    # Fetch one page of planned meals
+    total_meals = db.count_meal_plan_entries(st.session_state.user_id)
+    total_pages = max(1, math.ceil(total_meals / MEALS_PER_PAGE))
+    current_page = st.session_state.meal_list_page
+    if current_page is None:
+        # Open on upcoming meals; earlier ones are behind "Previous"
+        yesterday = (datetime.now().date() - timedelta(days=1)).strftime('%Y-%m-%d')
+        past_meals = db.count_meal_plan_entries(st.session_state.user_id, end_date=yesterday)
+        current_page = past_meals // MEALS_PER_PAGE
+    current_page = min(current_page, total_pages - 1)
+    
+    meals_by_date = group_meals_by_date(db.get_meal_plan_entries(
+        st.session_state.user_id,
+        limit=MEALS_PER_PAGE,
+        offset=current_page * MEALS_PER_PAGE
+    ))
+    
     if meals_by_date:
         # Sort dates
         sorted_dates = sorted(meals_by_date.keys())
@@ -333,6 +350,20 @@ else:
             
             st.markdown('</div>', unsafe_allow_html=True)
             st.markdown("<br>", unsafe_allow_html=True)
+        
+        # Page navigation
+        if total_pages > 1:
+            col_prev, col_page, col_next = st.columns([1, 3, 1])
+            with col_prev:
+                if st.button("⬅️ Previous", use_container_width=True, disabled=current_page == 0):
+                    st.session_state.meal_list_page = current_page - 1
+                    st.rerun()
+            with col_page:
+                st.markdown(f'<div class="week-navigation">Page {current_page + 1} of {total_pages}</div>', unsafe_allow_html=True)
+            with col_next:
+                if st.button("➡️ Next", use_container_width=True, disabled=current_page >= total_pages - 1):
+                    st.session_state.meal_list_page = current_page + 1
+                    st.rerun()
     else:
         st.info("📅 Your meal plan is empty. Add meals to get started!")
 
@@ -341,9 +372,7 @@ if 'quick_add_date' in st.session_state:
     st.markdown("---")
     st.subheader(f"➕ Add Meal for {st.session_state.quick_add_date}")
     
-    user_recipes = db.get_user_cookbook(st.session_state.user_id)
-    saved_recipes = db.get_saved_public_recipes(st.session_state.user_id)
-    all_available_recipes = user_recipes + saved_recipes
+    all_available_recipes = db.get_recipe_options(st.session_state.user_id)
     
     if all_available_recipes:
         with st.form("quick_add_meal"):
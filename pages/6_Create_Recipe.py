@@ -1,8 +1,10 @@
 import streamlit as st
 import database as db
-import os
 import theme_manager
+import media_store
+import auth_session
 
+auth_session.restore_session()
 theme_manager.apply_user_theme()
 
 # Page config
@@ -185,31 +187,23 @@ with col_create:
         elif not instructions or not instructions.strip():
             st.error("❌ Please add cooking instructions")
         else:
-            # Handle image upload
+            # Handle image upload (stored by content, with display/thumbnail variants)
             image_path = None
             if uploaded_file is not None:
-                # Create uploads directory if it doesn't exist
-                os.makedirs('data/uploads', exist_ok=True)
-                
-                # Generate unique filename
-                import time
-                timestamp = int(time.time())
-                file_extension = uploaded_file.name.split('.')[-1]
-                image_path = f"data/uploads/{st.session_state.user_id}_{timestamp}.{file_extension}"
-                
-                # Save the file
-                with open(image_path, 'wb') as f:
-                    f.write(uploaded_file.getbuffer())
+                image_path = media_store.save_upload(uploaded_file.getvalue())
             
-            # Create recipe in database with structured ingredients
-            result = db.create_recipe(
-                user_id=st.session_state.user_id,
-                title=recipe_title.strip(),
-                ingredients=st.session_state.new_recipe_ingredients,
-                instructions=instructions.strip(),
-                image_path=image_path,
-                is_public=is_public
-            )
+            if isinstance(image_path, dict) and 'error' in image_path:
+                result = image_path
+            else:
+                # Create recipe in database with structured ingredients
+                result = db.create_recipe(
+                    user_id=st.session_state.user_id,
+                    title=recipe_title.strip(),
+                    ingredients=st.session_state.new_recipe_ingredients,
+                    instructions=instructions.strip(),
+                    image_path=image_path,
+                    is_public=is_public
+                )
             
             if isinstance(result, dict) and 'error' in result:
                 st.error(f"❌ {result['error']}")
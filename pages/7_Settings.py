@@ -1,7 +1,9 @@
 import streamlit as st
 import database as db
 import theme_manager
+import auth_session
 
+auth_session.restore_session()
 theme_manager.apply_user_theme()
 
 # Page config
@@ -54,33 +56,29 @@ st.markdown(f"""
 """, unsafe_allow_html=True)
 
 # Get statistics
-user_recipes = db.get_user_cookbook(st.session_state.user_id)
-saved_recipes = db.get_saved_public_recipes(st.session_state.user_id)
-pantry_items = db.get_user_pantry(st.session_state.user_id)
-shopping_items = db.get_user_shopping_list(st.session_state.user_id)
-meal_plans = db.get_user_meal_plan(st.session_state.user_id)
+stats = db.get_user_stats(st.session_state.user_id)
 
 # Stats grid
 st.markdown(f"""
 <div class="stats-grid">
     <div class="stat-card">
-        <div class="stat-number">{len(user_recipes)}</div>
+        <div class="stat-number">{stats['recipes']}</div>
         <div class="stat-label">My Recipes</div>
     </div>
     <div class="stat-card">
-        <div class="stat-number">{len(saved_recipes)}</div>
+        <div class="stat-number">{stats['saved_recipes']}</div>
         <div class="stat-label">Saved Recipes</div>
     </div>
     <div class="stat-card">
-        <div class="stat-number">{len(pantry_items)}</div>
+        <div class="stat-number">{stats['pantry_items']}</div>
         <div class="stat-label">Pantry Items</div>
     </div>
     <div class="stat-card">
-        <div class="stat-number">{len(shopping_items)}</div>
+        <div class="stat-number">{stats['shopping_items']}</div>
         <div class="stat-label">Shopping Items</div>
     </div>
     <div class="stat-card">
-        <div class="stat-number">{len(meal_plans)}</div>
+        <div class="stat-number">{stats['meal_plans']}</div>
         <div class="stat-label">Planned Meals</div>
     </div>
 </div>
@@ -145,14 +143,14 @@ if st.session_state.show_change_username:
             
             if verify_btn:
                 if current_password:
-                    # Verify password
-                    verified = db.verify_user(st.session_state.username, current_password)
-                    if verified:
+                    # Verify password once; the token stands in for it in the next step
+                    token = db.create_verification_token(st.session_state.user_id, current_password)
+                    if isinstance(token, dict) and "error" in token:
+                        st.error(f"❌ {token['error']}")
+                    else:
                         st.session_state.username_verified = True
-                        st.session_state.temp_password = current_password
+                        st.session_state.verification_token = token
                         st.rerun()
-                    else:
-                        st.error("❌ Incorrect password. Please try again.")
                 else:
                     st.error("❌ Please enter your current password.")
             
@@ -195,8 +193,9 @@ if st.session_state.show_change_username:
                 else:
                     result = db.change_username(
                         st.session_state.user_id,
-                        st.session_state.temp_password,
-                        new_username
+                        None,
+                        new_username,
+                        verification_token=st.session_state.get('verification_token')
                     )
                     
                     if isinstance(result, dict) and "error" in result:
@@ -206,8 +205,8 @@ if st.session_state.show_change_username:
                         st.session_state.username = new_username
                         st.session_state.show_change_username = False
                         st.session_state.username_verified = False
-                        if 'temp_password' in st.session_state:
-                            del st.session_state.temp_password
+                        if 'verification_token' in st.session_state:
+                            del st.session_state.verification_token
                         st.success("✅ Username changed successfully!")
                         st.balloons()
                         import time
@@ -217,8 +216,9 @@ if st.session_state.show_change_username:
             if cancel_btn:
                 st.session_state.show_change_username = False
                 st.session_state.username_verified = False
-                if 'temp_password' in st.session_state:
-                    del st.session_state.temp_password
+                if 'verification_token' in st.session_state:
+                    db.revoke_verification_token(st.session_state.verification_token)
+                    del st.session_state.verification_token
                 st.rerun()
 
 # Change Password Flow
@@ -249,14 +249,14 @@ if st.session_state.show_change_password:
             
             if verify_btn:
                 if current_password:
-                    # Verify password
-                    verified = db.verify_user(st.session_state.username, current_password)
-                    if verified:
+                    # Verify password once; the token stands in for it in the next step
+                    token = db.create_verification_token(st.session_state.user_id, current_password)
+                    if isinstance(token, dict) and "error" in token:
+                        st.error(f"❌ {token['error']}")
+                    else:
                         st.session_state.password_verified = True
-                        st.session_state.temp_password = current_password
+                        st.session_state.verification_token = token
                         st.rerun()
-                    else:
-                        st.error("❌ Incorrect password. Please try again.")
                 else:
                     st.error("❌ Please enter your current password.")
             
@@ -333,8 +333,9 @@ if st.session_state.show_change_password:
                 else:
                     result = db.change_password(
                         st.session_state.user_id,
-                        st.session_state.temp_password,
-                        new_password
+                        None,
+                        new_password,
+                        verification_token=st.session_state.get('verification_token')
                     )
                     
                     if isinstance(result, dict) and "error" in result:
@@ -342,8 +343,8 @@ if st.session_state.show_change_password:
                     else:
                         st.session_state.show_change_password = False
                         st.session_state.password_verified = False
-                        if 'temp_password' in st.session_state:
-                            del st.session_state.temp_password
+                        if 'verification_token' in st.session_state:
+                            del st.session_state.verification_token
                         st.success("✅ Password changed successfully!")
                         st.balloons()
                         import time
@@ -353,8 +354,9 @@ if st.session_state.show_change_password:
             if cancel_btn:
                 st.session_state.show_change_password = False
                 st.session_state.password_verified = False
-                if 'temp_password' in st.session_state:
-                    del st.session_state.temp_password
+                if 'verification_token' in st.session_state:
+                    db.revoke_verification_token(st.session_state.verification_token)
+                    del st.session_state.verification_token
                 st.rerun()
 
 st.markdown('<div class="settings-divider"></div>', unsafe_allow_html=True)
@@ -393,6 +395,7 @@ with st.form("preferences_form"):
     
     if st.form_submit_button("💾 Save Preferences", type="primary", use_container_width=True):
         db.update_user_settings(st.session_state.user_id, theme, landing_page)
+        theme_manager.set_user_theme(theme)
         st.markdown('<div class="success-box">✅ Preferences saved successfully!</div>', unsafe_allow_html=True)
         st.rerun()
 
@@ -450,11 +453,11 @@ if 'confirm_reset' in st.session_state and st.session_state.confirm_reset:
     <strong>This action CANNOT be undone!</strong>
     </div>
     """.format(
-        len(user_recipes),
-        len(saved_recipes),
-        len(pantry_items),
-        len(shopping_items),
-        len(meal_plans)
+        stats['recipes'],
+        stats['saved_recipes'],
+        stats['pantry_items'],
+        stats['shopping_items'],
+        stats['meal_plans']
     ), unsafe_allow_html=True)
     
     st.text_input(
@@ -468,6 +471,7 @@ if 'confirm_reset' in st.session_state and st.session_state.confirm_reset:
         if st.button("🗑️ Yes, Delete Everything", type="primary", use_container_width=True):
             if st.session_state.get('reset_confirmation') == 'DELETE ALL MY DATA':
                 db.reset_user_data(st.session_state.user_id)
+                theme_manager.set_user_theme('light')  # reset restores the default theme
                 st.session_state.confirm_reset = False
                 st.success("✅ All data has been reset!")
                 st.balloons()
@@ -525,10 +529,8 @@ st.markdown("---")
 col1, col2, col3 = st.columns([1, 1, 1])
 with col2:
     if st.button("🚪 Logout", use_container_width=True, type="primary"):
-        # Clear session state - store keys first to avoid modification during iteration
-        keys_to_clear = list(st.session_state.keys())
-        for key in keys_to_clear:
-            del st.session_state[key]
+        # Forget the remembered sign-in and clear session state
+        auth_session.sign_out()
         # Redirect immediately without any display operations
         st.switch_page("sign_in.py")
 
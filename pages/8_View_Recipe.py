@@ -1,10 +1,11 @@
 import streamlit as st
 import database as db
-import os
-import base64
+import html
 import theme_manager
-import json
+import media_store
+import auth_session
 
+auth_session.restore_session()
 theme_manager.apply_user_theme()
 
 # Page config
@@ -31,20 +32,9 @@ if not recipe:
 creator = db.get_user(recipe['user_id'])
 creator_name = creator['username'] if creator else f"User {recipe['user_id']}"
 
-# Get structured ingredients
+# Get structured ingredients (recipe_ingredients is the source of truth)
 structured_ingredients = db.get_recipe_ingredients(recipe['recipe_id'])
 
-# If no structured ingredients, try to parse from JSON or fall back to text
-if not structured_ingredients:
-    try:
-        ingredients_data = json.loads(recipe['ingredients'])
-        if isinstance(ingredients_data, list):
-            structured_ingredients = ingredients_data
-        else:
-            structured_ingredients = None
-    except (json.JSONDecodeError, ValueError, TypeError):
-        structured_ingredients = None
-
 # Header
 col1, col2 = st.columns([3, 1])
 with col1:
@@ -59,38 +49,40 @@ st.markdown("---")
 st.markdown('<div class="recipe-card">', unsafe_allow_html=True)
 
 # Title + Status
-st.markdown(f'<div class="recipe-title">{recipe["title"]}</div>', unsafe_allow_html=True)
+st.markdown(f'<div class="recipe-title">{html.escape(recipe["title"])}</div>', unsafe_allow_html=True)
 status_class = "status-public" if recipe['is_public'] else "status-private"
 status_text = "🌐: Public" if recipe['is_public'] else "🔒: Private"
 st.markdown(f'<span class="status-badge {status_class}">{status_text}</span>', unsafe_allow_html=True)
 
 # Metadata
 created = recipe['created_at'][:10] if recipe['created_at'] else "Unknown"
-if structured_ingredients:
-    ing_count = len(structured_ingredients)
-else:
-    ing_count = len([i for i in recipe['ingredients'].split('\n') if i.strip()])
+ing_count = len(structured_ingredients)
 step_count = len([i for i in recipe['instructions'].split('\n') if i.strip()])
 
 st.markdown(f"""
 <div class="metadata-bar">
-    <div class="meta-item"><span class="meta-label">Created by:</span> {creator_name}</div>
+    <div class="meta-item"><span class="meta-label">Created by:</span> {html.escape(creator_name)}</div>
     <div class="meta-item"><span class="meta-label">Ingredients:</span> {ing_count}</div>
     <div class="meta-item"><span class="meta-label">Steps:</span> {step_count}</div>
 </div>
 """, unsafe_allow_html=True)
 
 # === IMAGE ===
-if recipe['image_path'] and os.path.exists(recipe['image_path']):
-    with open(recipe['image_path'], "rb") as f:
-        img_data = base64.b64encode(f.read()).decode()
-    img_uri = f"data:image/jpeg;base64,{img_data}"
-    st.markdown(f'<div class="img-container"><img src="{img_uri}"></div>', unsafe_allow_html=True)
+img_src = media_store.image_src(recipe['image_path'])
+if img_src:
+    st.markdown(f'<div class="img-container"><img src="{img_src}"></div>', unsafe_allow_html=True)
 else:
-    st.markdown("""
+    # A new upload may still be written by the background worker
+    if media_store.is_processing(recipe['image_path']):
+        placeholder = "Camera: Image is still processing, refresh in a moment"
+    elif media_store.upload_error(recipe['image_path']):
+        placeholder = "Camera: The image could not be stored, please upload it again"
+    else:
+        placeholder = "Camera: No image uploaded"
+    st.markdown(f"""
     <div class="img-container">
         <div style="background: rgba(255,255,255,0.08); border: 2px dashed rgba(255,255,255,0.2); border-radius: 20px; padding: 4rem; color: #94a3b8;">
-            Camera: No image uploaded
+            {placeholder}
         </div>
     </div>
     """, unsafe_allow_html=True)
@@ -111,13 +103,9 @@ if structured_ingredients:
         if isinstance(ing, dict):
             qty = ing.get('quantity')
             unit = ing.get('unit')
-            if qty and unit:
-                # Check if unit is in our conversion map
-                test_metric, _ = db.convert_unit(qty, unit, to_system="metric")
-                test_imperial, _ = db.convert_unit(qty, unit, to_system="imperial")
-                if test_metric != qty or test_imperial != qty:
-                    has_convertible = True
-                    break
+            if qty and db.is_convertible(unit):
+                has_convertible = True
+                break
 
 # Show conversion buttons only if there are convertible ingredients
 if has_convertible:
@@ -138,6 +126,15 @@ if has_convertible:
             st.session_state.unit_display_mode = "imperial"
             st.rerun()
 
+# Convert all ingredients to the chosen unit system in one pass
+converted_quantities, converted_units = [], []
+if structured_ingredients and st.session_state.unit_display_mode is not None:
+    converted_quantities, converted_units = db.convert_units_batch(
+        [ing.get('quantity') if isinstance(ing, dict) else None for ing in structured_ingredients],
+        [ing.get('unit') if isinstance(ing, dict) else None for ing in structured_ingredients],
+        to_system=st.session_state.unit_display_mode
+    )
+
 st.markdown('<div class="ingredients-box">', unsafe_allow_html=True)
 
 if structured_ingredients:
@@ -156,11 +153,7 @@ if structured_ingredients:
         
         # Apply conversion based on display mode
         if qty and unit and st.session_state.unit_display_mode is not None:
-            converted_qty, converted_unit = db.convert_unit(
-                qty, 
-                unit, 
-                to_system=st.session_state.unit_display_mode
-            )
+            converted_qty, converted_unit = converted_quantities[idx], converted_units[idx]
             formatted_qty = f"{converted_qty:.2f}".rstrip("0").rstrip(".")
             display_text = f"{formatted_qty} {converted_unit} {name}"
         elif qty:
@@ -170,12 +163,9 @@ if structured_ingredients:
         else:
             display_text = name
         
-        st.markdown(f'<div class="ingredient-item">{display_text}</div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="ingredient-item">{html.escape(display_text)}</div>', unsafe_allow_html=True)
 else:
-    # Fall back to old text format
-    for ing in recipe['ingredients'].split('\n'):
-        if ing.strip():
-            st.markdown(f'<div class="ingredient-item">{ing.strip()}</div>', unsafe_allow_html=True)
+    st.markdown('<div class="ingredient-item">No ingredients listed</div>', unsafe_allow_html=True)
 
 st.markdown('</div>', unsafe_allow_html=True)
 
@@ -184,7 +174,7 @@ st.markdown('<h2 class="section-header">📝: Instructions</h2>', unsafe_allow_h
 st.markdown('<div class="instructions-box">', unsafe_allow_html=True)
 for i, step in enumerate(recipe['instructions'].split('\n'), 1):
     if step.strip():
-        st.markdown(f'<div class="instruction-step"><span class="step-num">Step {i}:</span> {step.strip()}</div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="instruction-step"><span class="step-num">Step {i}:</span> {html.escape(step.strip())}</div>', unsafe_allow_html=True)
 st.markdown('</div>', unsafe_allow_html=True)
 
 # Add this section after the INSTRUCTIONS section and before the BUTTONS section
@@ -209,7 +199,7 @@ if structured_ingredients:
                         
                         # Apply conversion if in converted mode
                         if qty and unit and st.session_state.unit_display_mode is not None:
-                            qty, unit = db.convert_unit(qty, unit, to_system=st.session_state.unit_display_mode)
+                            qty, unit = converted_quantities[idx], converted_units[idx]
                         
                         result = db.create_shopping_list_item(
                             st.session_state.user_id,
@@ -241,7 +231,7 @@ if structured_ingredients:
             
             # Apply conversion based on display mode
             if qty and unit and st.session_state.unit_display_mode is not None:
-                converted_qty, converted_unit = db.convert_unit(qty, unit, to_system=st.session_state.unit_display_mode)
+                converted_qty, converted_unit = converted_quantities[idx], converted_units[idx]
                 formatted_qty = f"{converted_qty:.2f}".rstrip("0").rstrip(".")
                 display_text = f"{formatted_qty} {converted_unit} {name}"
             elif qty:
@@ -1,10 +1,11 @@
 import streamlit as st
 import database as db
 import os
-import base64
 import theme_manager
-import json
+import media_store
+import auth_session
 
+auth_session.restore_session()
 theme_manager.apply_user_theme()
 
 # Page config
@@ -42,41 +43,15 @@ if recipe['user_id'] != st.session_state.user_id:
 
 # Initialize ingredients list in session state if not exists or if editing a new recipe
 if 'edit_recipe_ingredients' not in st.session_state or st.session_state.get('editing_recipe_id') != recipe['recipe_id']:
-    # Load existing ingredients
-    # First try to get structured ingredients from the new table
-    structured_ingredients = db.get_recipe_ingredients(recipe['recipe_id'])
-    
-    if structured_ingredients:
-        # Use structured ingredients from database
-        st.session_state.edit_recipe_ingredients = [
-            {
-                'quantity': ing['quantity'],
-                'unit': ing['unit'],
-                'name': ing['name']
-            }
-            for ing in structured_ingredients
-        ]
-    else:
-        # Try to parse from JSON (new format stored in recipes table)
-        try:
-            ingredients_data = json.loads(recipe['ingredients'])
-            if isinstance(ingredients_data, list):
-                st.session_state.edit_recipe_ingredients = ingredients_data
-            else:
-                raise ValueError("Not a list")
-        except (json.JSONDecodeError, ValueError, TypeError):
-            # Old format - parse text into structured format
-            st.session_state.edit_recipe_ingredients = []
-            for line in recipe['ingredients'].split('\n'):
-                line = line.strip()
-                if line:
-                    # Simple parsing - just put the whole line as the name
-                    # User can edit to add proper structure
-                    st.session_state.edit_recipe_ingredients.append({
-                        'quantity': None,
-                        'unit': None,
-                        'name': line
-                    })
+    # Load existing ingredients (recipe_ingredients is the source of truth)
+    st.session_state.edit_recipe_ingredients = [
+        {
+            'quantity': ing['quantity'],
+            'unit': ing['unit'],
+            'name': ing['name']
+        }
+        for ing in db.get_recipe_ingredients(recipe['recipe_id'])
+    ]
     
     st.session_state.editing_recipe_id = recipe['recipe_id']
 
@@ -230,12 +205,10 @@ st.markdown("---")
 st.markdown('<h3 class="section-header">📸 Recipe Image</h3>', unsafe_allow_html=True)
 
 # Show current image if exists
-if recipe['image_path'] and os.path.exists(recipe['image_path']):
+img_src = media_store.image_src(recipe['image_path'], variant='thumb')
+if img_src:
     st.markdown("**Current Image:**")
-    with open(recipe['image_path'], "rb") as f:
-        img_data = base64.b64encode(f.read()).decode()
-    img_uri = f"data:image/jpeg;base64,{img_data}"
-    st.markdown(f'<div class="img-preview"><img src="{img_uri}"></div>', unsafe_allow_html=True)
+    st.markdown(f'<div class="img-preview"><img src="{img_src}"></div>', unsafe_allow_html=True)
     
     remove_image = st.checkbox("❌ Remove current image")
 else:
@@ -272,59 +245,55 @@ with col1:
             st.error("❌ Instructions cannot be empty")
         else:
             # Handle image
-            image_path = recipe['image_path']
+            old_image_path = recipe['image_path']
+            image_path = old_image_path
             
             # Remove old image if requested
-            if remove_image and image_path and os.path.exists(image_path):
-                try:
-                    os.remove(image_path)
-                    image_path = None
-                except:
-                    pass
+            if remove_image:
+                image_path = None
             
-            # Save new image
+            # Save new image (stored by content, with display/thumbnail variants)
             if uploaded_file:
-                os.makedirs('data/images', exist_ok=True)
-                # Generate unique filename
-                import time
-                filename = f"recipe_{st.session_state.user_id}_{int(time.time())}_{uploaded_file.name}"
-                image_path = os.path.join('data/images', filename)
-                
-                # Remove old image if exists
-                if recipe['image_path'] and os.path.exists(recipe['image_path']):
-                    try:
-                        os.remove(recipe['image_path'])
-                    except:
-                        pass
-                
-                # Save new image
-                with open(image_path, 'wb') as f:
-                    f.write(uploaded_file.getbuffer())
-            
-            # Update recipe in database with structured ingredients
-            result = db.update_user_recipes(
-                recipe_id=recipe['recipe_id'],
-                title=title.strip(),
-                ingredients=st.session_state.edit_recipe_ingredients,  # Pass list of dicts
-                instructions=instructions.strip(),
-                image_path=image_path,
-                is_public=is_public
-            )
+                image_path = media_store.save_upload(uploaded_file.getvalue())
             
-            if result:
-                st.success("✅ Recipe updated successfully!")
-                st.balloons()
-                # Clear edit session state
-                del st.session_state.edit_recipe_id
-                del st.session_state.edit_recipe_ingredients
-                del st.session_state.editing_recipe_id
-                # Navigate to view page
-                st.session_state.selected_recipe_id = recipe['recipe_id']
-                import time
-                time.sleep(1)
-                st.switch_page("pages/8_View_Recipe.py")
+            if isinstance(image_path, dict) and 'error' in image_path:
+                st.error(f"❌ {image_path['error']}")
             else:
-                st.error("❌ Failed to update recipe. Please try again.")
+                # Update recipe in database with structured ingredients
+                result = db.update_user_recipes(
+                    recipe_id=recipe['recipe_id'],
+                    title=title.strip(),
+                    ingredients=st.session_state.edit_recipe_ingredients,  # Pass list of dicts
+                    instructions=instructions.strip(),
+                    image_path=image_path,
+                    is_public=is_public
+                )
+                
+                if result:
+                    # The recipe now points at the new image, so the old one can
+                    # go. Images in the media store may be shared by several
+                    # recipes, so only older per-recipe uploads are deleted here
+                    if (image_path != old_image_path and old_image_path
+                            and not media_store.is_stored(old_image_path)
+                            and os.path.exists(old_image_path)):
+                        try:
+                            os.remove(old_image_path)
+                        except OSError:
+                            pass
+                    
+                    st.success("✅ Recipe updated successfully!")
+                    st.balloons()
+                    # Clear edit session state
+                    del st.session_state.edit_recipe_id
+                    del st.session_state.edit_recipe_ingredients
+                    del st.session_state.editing_recipe_id
+                    # Navigate to view page
+                    st.session_state.selected_recipe_id = recipe['recipe_id']
+                    import time
+                    time.sleep(1)
+                    st.switch_page("pages/8_View_Recipe.py")
+                else:
+                    st.error("❌ Failed to update recipe. Please try again.")
 
 with col2:
     if st.button("👁️ Preview Recipe", use_container_width=True):
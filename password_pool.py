@@ -0,0 +1,129 @@
+import os
+import re
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, CancelledError, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt
+
+# Password hashing settings (can be overridden per deployment with environment variables)
+BCRYPT_ROUNDS = int(os.environ.get('RECIPES_BCRYPT_ROUNDS', '12'))
+PASSWORD_WORKERS = int(os.environ.get('RECIPES_PASSWORD_WORKERS', str(min(2, os.cpu_count() or 1))))  # 0 = hash inline
+PASSWORD_MAX_PENDING = int(os.environ.get('RECIPES_PASSWORD_MAX_PENDING', '32'))
+PASSWORD_TIMEOUT = float(os.environ.get('RECIPES_PASSWORD_TIMEOUT', '10'))  # seconds
+
+_executor = None
+_executor_lock = threading.Lock()
+_stats = {'pending': 0, 'completed': 0, 'failed': 0, 'cancelled': 0, 'rejected': 0, 'timeouts': 0, 'restarts': 0}
+
+class PasswordPoolError(Exception):
+    """bcrypt work could not be done right now (pool full or too slow)."""
+
+#worker functions (run in the pool processes)
+def _hash(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds)).decode('utf-8')
+
+def _check(password, hashed):
+    return bcrypt.checkpw(password, hashed)
+
+#helper functions
+def _get_executor():
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            # spawn: forking a process that runs Streamlit's threads is not safe
+            _executor = ProcessPoolExecutor(
+                max_workers=PASSWORD_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _executor
+
+def _reset_executor(executor):
+    """Drop a broken pool so the next call starts a new one."""
+    global _executor
+
+    with _executor_lock:
+        if _executor is not executor:
+            return  # already replaced by another thread
+        _executor = None
+        _stats['restarts'] += 1
+
+    executor.shutdown(wait=False, cancel_futures=True)
+
+def _task_done(future):
+    with _executor_lock:
+        _stats['pending'] -= 1
+        if future.cancelled():
+            _stats['cancelled'] += 1
+        elif future.exception() is not None:
+            _stats['failed'] += 1
+        else:
+            _stats['completed'] += 1
+
+def _run(func, *args):
+    if PASSWORD_WORKERS <= 0:
+        return func(*args)
+
+    executor = _get_executor()
+
+    with _executor_lock:
+        if _stats['pending'] >= PASSWORD_MAX_PENDING:
+            _stats['rejected'] += 1
+            raise PasswordPoolError("Too many sign-in requests right now, please try again")
+        _stats['pending'] += 1
+
+    try:
+        future = executor.submit(func, *args)
+    except (BrokenProcessPool, RuntimeError):
+        # Pool broken (a worker died) or shut down: start over on the next call
+        with _executor_lock:
+            _stats['pending'] -= 1
+            _stats['failed'] += 1
+        _reset_executor(executor)
+        raise PasswordPoolError("Sign-in is temporarily unavailable, please try again")
+    future.add_done_callback(_task_done)
+
+    try:
+        return future.result(timeout=PASSWORD_TIMEOUT)
+    except FutureTimeoutError:
+        future.cancel()
+        with _executor_lock:
+            _stats['timeouts'] += 1
+        raise PasswordPoolError("Sign-in is taking too long, please try again")
+    except (BrokenProcessPool, CancelledError):
+        _reset_executor(executor)
+        raise PasswordPoolError("Sign-in is temporarily unavailable, please try again")
+
+def hash_password(password):
+    return _run(_hash, password.encode(), BCRYPT_ROUNDS)
+
+def check_password(password, hashed):
+    return _run(_check, password.encode(), hashed.encode())
+
+def get_rounds(hashed):
+    # bcrypt hashes look like $2b$12$<salt+hash>
+    match = re.match(r'^\$2[abxy]?\$(\d{2})\$', hashed)
+    return int(match.group(1)) if match else None
+
+def needs_rehash(hashed):
+    """True if the hash was made with a different cost factor than BCRYPT_ROUNDS."""
+    return get_rounds(hashed) != BCRYPT_ROUNDS
+
+def get_pool_stats():
+    """Queue depth and counters, e.g. for a health check."""
+    with _executor_lock:
+        return {**_stats, 'workers': PASSWORD_WORKERS, 'max_pending': PASSWORD_MAX_PENDING}
+
+def shutdown_pool():
+    global _executor
+
+    with _executor_lock:
+        executor, _executor = _executor, None
+
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+atexit.register(shutdown_pool)
@@ -0,0 +1,86 @@
+from collections import namedtuple
+
+class Record:
+    """
+    Row record returned by the database functions.
+
+    Records are named tuples (no per-row __dict__), built straight from the
+    sqlite3 row by a cursor row_factory. They can still be used like the
+    dicts the pages were written against: record['title'], record.get('unit'),
+    'title' in record, record.keys() and {**record} all work.
+    """
+    __slots__ = ()
+
+    # Columns stored as 0/1 in SQLite that should read as True/False
+    _bool_fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._index = {name: i for i, name in enumerate(cls._fields)}
+        cls._bool_indexes = tuple(cls._index[name] for name in cls._bool_fields)
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        # Signature matches sqlite3 row_factory
+        if cls._bool_indexes:
+            row = list(row)
+            for i in cls._bool_indexes:
+                if row[i] is not None:
+                    row[i] = bool(row[i])
+        return tuple.__new__(cls, row)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return tuple.__getitem__(self, self._index[key])
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        i = self._index.get(key)
+        return default if i is None else tuple.__getitem__(self, i)
+
+    def keys(self):
+        return self._fields
+
+    def __contains__(self, key):
+        return key in self._index
+
+
+class Recipe(Record, namedtuple('Recipe', [
+    'recipe_id', 'user_id', 'title', 'ingredients', 'instructions',
+    'image_path', 'is_public', 'created_at', 'username'
+])):
+    __slots__ = ()
+    _bool_fields = ('is_public',)
+
+
+class RecipeSummary(Record, namedtuple('RecipeSummary', [
+    'recipe_id', 'user_id', 'title', 'ingredients_preview',
+    'image_path', 'is_public', 'created_at', 'username'
+])):
+    __slots__ = ()
+    _bool_fields = ('is_public',)
+
+
+class RecipeSearchResult(Record, namedtuple('RecipeSearchResult', RecipeSummary._fields + ('snippet',))):
+    __slots__ = ()
+    _bool_fields = ('is_public',)
+
+
+class PantryItem(Record, namedtuple('PantryItem', [
+    'pantry_id', 'name', 'quantity', 'unit', 'expiration_date', 'low_threshold'
+])):
+    __slots__ = ()
+
+
+class ShoppingItem(Record, namedtuple('ShoppingItem', [
+    'list_id', 'name', 'quantity', 'unit', 'is_checked'
+])):
+    __slots__ = ()
+    _bool_fields = ('is_checked',)
+
+
+class MealPlanEntry(Record, namedtuple('MealPlanEntry', [
+    'plan_id', 'date', 'meal_type', 'recipe_id', 'recipe_title', 'image_path', 'is_public'
+])):
+    __slots__ = ()
+    _bool_fields = ('is_public',)
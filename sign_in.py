@@ -1,14 +1,20 @@
 import streamlit as st
 import database as db
 import theme_manager
+import auth_session
+import media_gc
 
+auth_session.restore_session()
 theme_manager.apply_user_theme()
 
 #streamlit run sign_in.py
 
-# Initialize database
+# Initialize database (no-op after the first run in this server process)
 db.init_DB()
 
+# Periodic cleanup of unused recipe images (started once per server process)
+media_gc.start_scheduler()
+
 # Page config
 st.set_page_config(
     page_title="Recipes For Success - Sign In",
@@ -33,8 +39,7 @@ if st.session_state.user_id:
     st.info("You are already logged in. Navigate to other pages using the sidebar.")
     
     if st.button("Sign Out"):
-        st.session_state.user_id = None
-        st.session_state.username = None
+        auth_session.sign_out()
         st.rerun()
 else:
     # Toggle between Sign In and Create Account
@@ -51,6 +56,8 @@ else:
         if mode == "Create Account":
             st.caption("Password must be at least 8 characters")
         
+        remember_me = st.checkbox("Remember me on this device")
+        
         # Submit button (now inside form)
         submitted = st.form_submit_button(mode)
         
@@ -70,6 +77,8 @@ else:
                         # Success - user_id returned
                         st.session_state.user_id = result
                         st.session_state.username = username
+                        if remember_me:
+                            auth_session.remember_user(result)
                         st.success(f"✅ Account created successfully! Welcome, {username}!")
                         st.switch_page("pages/1_Dashboard.py")
                 
@@ -79,10 +88,14 @@ else:
                     
                     if user_id is None:
                         st.error("⚠️ Invalid username or password")
+                    elif isinstance(user_id, dict) and "error" in user_id:
+                        st.error(f"⚠️ {user_id['error']}")
                     else:
                         # Success
                         st.session_state.user_id = user_id
                         st.session_state.username = username
+                        if remember_me:
+                            auth_session.remember_user(user_id)
                         st.success(f"✅ Welcome back, {username}!")
                         st.switch_page("pages/1_Dashboard.py")
     
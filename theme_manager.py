@@ -1,29 +1,83 @@
 import streamlit as st
 import database as db
 import os
-import time
+import re
+import hashlib
+import threading
+
+THEMES_DIR = "themes"
+DEFAULT_THEME = "light"
+
+# In dev mode the theme files are re-read when they change on disk
+DEV_MODE = os.environ.get('RECIPES_DEV_MODE', '0') == '1'
+
+# theme -> (mtime, minified css, version); filled once per server process
+_css_cache = {}
+_css_lock = threading.Lock()
+
+def minify_css(css):
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)  # comments
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,])\s*', r'\1', css)
+    css = css.replace(';}', '}')
+    return css.strip()
+
+def load_theme_css(theme):
+    """
+    Minified CSS for a theme and a short hash of it (used as the version
+    marker), or (None, None) if the theme file does not exist.
+    """
+    theme_file = os.path.join(THEMES_DIR, f"{theme}.css")
+
+    with _css_lock:
+        cached = _css_cache.get(theme)
+
+    if cached is not None and not DEV_MODE:
+        return cached[1], cached[2]
+
+    try:
+        mtime = os.path.getmtime(theme_file)
+    except OSError:
+        return None, None
+
+    if cached is not None and cached[0] == mtime:
+        return cached[1], cached[2]
+
+    with open(theme_file) as f:
+        css = minify_css(f.read())
+    version = hashlib.sha1(css.encode()).hexdigest()[:10]
+
+    with _css_lock:
+        _css_cache[theme] = (mtime, css, version)
+
+    return css, version
+
+def set_user_theme(theme):
+    """Remember the signed-in user's theme for this session (call after saving it)."""
+    st.session_state['theme'] = theme
+    st.session_state['theme_user_id'] = st.session_state.get('user_id')
+
+def get_user_theme():
+    user_id = st.session_state.get('user_id')
+    if user_id is None:
+        return DEFAULT_THEME
+
+    # Looked up once per signed-in user, then kept in session state
+    if st.session_state.get('theme_user_id') != user_id or 'theme' not in st.session_state:
+        settings = db.get_user_settings(user_id)
+        set_user_theme(settings['theme'] if settings else DEFAULT_THEME)
+
+    return st.session_state['theme']
 
 def apply_user_theme():
-    # Get the theme that should be applied
-    if 'user_id' not in st.session_state or st.session_state.user_id is None:
-        target_theme = 'light'
-    else:
-        settings = db.get_user_settings(st.session_state.user_id)
-        target_theme = settings['theme'] if settings else 'light'
-    
-    # Always apply the CSS, regardless of what's in session_state
-    theme_file = os.path.join("themes", f"{target_theme}.css")
-
-    if os.path.exists(theme_file):
-        with open(theme_file) as f:
-            css = f.read()
-        
-        # Cache bust with timestamp to ensure latest CSS is loaded
-        cache_bust = int(time.time())
+    target_theme = get_user_theme()
+    css, version = load_theme_css(target_theme)
+
+    if css is not None:
+        # The marker only changes when the CSS does, so reruns inject an identical block
         st.markdown(
-            f"<style>/* v{cache_bust} */\n{css}</style>", 
+            f"<style>/* v{version} */\n{css}</style>",
             unsafe_allow_html=True
         )
-        st.session_state['theme'] = target_theme  # Update after successful load
     else:
-        st.warning(f"Theme file not found: {theme_file}")
\ No newline at end of file
+        st.warning(f"Theme file not found: {os.path.join(THEMES_DIR, f'{target_theme}.css')}")